@@ -0,0 +1,31 @@
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.test_Card import classify_reference
+from tichu.Card import Cards, classify_mask
+
+### Microbenchmark of classify_mask against the card-by-card rules it replaced (tests/test_Card.py), per
+### combination type, on the combinations of random 13-card hands.
+### Usage: python benchmarks/ClassifyBenchmark.py [number of hands]
+if __name__ == '__main__':
+    num_hands = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    random.seed(1)
+
+    masks_by_type = {}
+    for _ in range(num_hands):
+        hand = Cards.from_mask(sum(1 << i for i in random.sample(range(52), 13)))
+        for combinations in hand.enumerate_combination():
+            for combination in combinations:
+                masks_by_type.setdefault(combination.type, []).append(combination.mask)
+    masks_by_type['all'] = [mask for masks in masks_by_type.values() for mask in masks]
+
+    for ctype, masks in masks_by_type.items():
+        masks = masks[:20000]
+        reference = min(timeit.repeat(lambda: [classify_reference(mask) for mask in masks], number=1, repeat=3))
+        histogram = min(timeit.repeat(lambda: [classify_mask(mask) for mask in masks], number=1, repeat=3))
+        print('%-12s n=%6d  card-by-card %6.2f us  classify_mask %5.2f us  (%.1fx)'
+              % (ctype, len(masks), reference / len(masks) * 1e6, histogram / len(masks) * 1e6, reference / histogram))
@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents.Conservative import Conservative
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+from tichu.TichuEnv import TichuEnv
+
+AGENTS = [Random(), Conservative(), Max(), Risk()]
+
+
+def new_env():
+    env = TichuEnv()
+    env.set_agents(AGENTS)
+    env.set_team_names(['Team 0', 'Team 1'])
+    return env
+
+
+def play_fresh(num_matches):
+    return [new_env().run()[0] for _ in range(num_matches)]
+
+
+def play_reused(num_matches):
+    env = new_env()
+    return [env.run()[0] for _ in range(num_matches)]
+
+
+### Matches per second with a new TichuEnv per match against one env reused for every match, best of
+### num_repeats alternating runs after a warm-up that fills the combination cache. Both play the same games
+### for the same global seed, which is checked.
+### Usage: python benchmarks/EnvReuseBenchmark.py [number of matches] [number of repeats]
+if __name__ == '__main__':
+    num_matches = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    num_repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    random.seed(0)
+    play_reused(num_matches)
+
+    results = {}
+    best = {}
+    for _ in range(num_repeats):
+        for play in (play_fresh, play_reused):
+            random.seed(0)
+            start = time.perf_counter()
+            points = play(num_matches)
+            elapsed = time.perf_counter() - start
+
+            assert results.setdefault('points', points) == points
+            best[play.__name__] = min(best.get(play.__name__, elapsed), elapsed)
+
+    for name, elapsed in best.items():
+        print('%-12s %7.1f matches/s' % (name, num_matches / elapsed))
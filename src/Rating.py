@@ -0,0 +1,108 @@
+import math
+from statistics import NormalDist
+
+NORMAL = NormalDist()
+
+
+class Rating:
+    def __init__(self, team_ids, mu=25., sigma=25. / 3, beta=25. / 6, tau=0., draw_probability=.03):
+        """
+        Online skill estimates of teams, TrueSkill-style: every team has a gaussian belief (mu, sigma) over its
+        skill, and a game's performance is its skill plus gaussian noise of deviation beta. Each game updates the
+        two teams' beliefs in O(1).
+        :param team_ids: ids of the rated teams
+        :param mu: initial mean skill
+        :param sigma: initial skill deviation
+        :param beta: performance deviation within a game
+        :param tau: deviation added to the skill before every game, so estimates keep adapting
+        :param draw_probability: probability of a draw between equal teams, sets the draw margin
+        """
+        self.beta = beta
+        self.tau = tau
+        self.draw_margin = NORMAL.inv_cdf((draw_probability + 1) / 2) * math.sqrt(2) * beta
+        self.ratings = {team_id: [mu, sigma] for team_id in team_ids}
+        self.games_played = 0
+
+    def update(self, team_a_id, team_b_id, outcome):
+        """
+        Update the skill estimates of two teams with the outcome of a game
+        :param team_a_id: id of team a
+        :param team_b_id: id of team b
+        :param outcome: 1 if team a won, 0 for a draw, -1 if team b won
+        :return: None
+        """
+        if outcome < 0:
+            team_a_id, team_b_id = team_b_id, team_a_id
+
+        rating_a = self.ratings[team_a_id]
+        rating_b = self.ratings[team_b_id]
+        variance_a = rating_a[1] ** 2 + self.tau ** 2
+        variance_b = rating_b[1] ** 2 + self.tau ** 2
+
+        c = math.sqrt(2 * self.beta ** 2 + variance_a + variance_b)
+        t = (rating_a[0] - rating_b[0]) / c
+        margin = self.draw_margin / c
+
+        # Mean and variance corrections of the truncated performance difference
+        if outcome == 0:
+            mass = max(NORMAL.cdf(margin - t) - NORMAL.cdf(-margin - t), 1e-12)
+            v = (NORMAL.pdf(-margin - t) - NORMAL.pdf(margin - t)) / mass
+            w = v ** 2 + ((margin - t) * NORMAL.pdf(margin - t) + (margin + t) * NORMAL.pdf(margin + t)) / mass
+        else:
+            v = NORMAL.pdf(t - margin) / max(NORMAL.cdf(t - margin), 1e-12)
+            w = v * (v + t - margin)
+
+        rating_a[0] += variance_a / c * v
+        rating_b[0] -= variance_b / c * v
+        rating_a[1] = math.sqrt(variance_a * max(1 - variance_a / c ** 2 * w, 1e-6))
+        rating_b[1] = math.sqrt(variance_b * max(1 - variance_b / c ** 2 * w, 1e-6))
+        self.games_played += 1
+
+    def get_win_probability(self, team_a_id, team_b_id):
+        """
+        Get the probability that team a beats team b, draws counted as half
+        :param team_a_id: id of team a
+        :param team_b_id: id of team b
+        :return: win probability
+        """
+        (mu_a, sigma_a), (mu_b, sigma_b) = self.ratings[team_a_id], self.ratings[team_b_id]
+        return NORMAL.cdf((mu_a - mu_b) / math.sqrt(2 * self.beta ** 2 + sigma_a ** 2 + sigma_b ** 2))
+
+    def get_information(self, team_a_id, team_b_id):
+        """
+        Get how informative a game between two teams is expected to be: the summed uncertainty of both teams,
+        weighted by how close their ratings are (the TrueSkill match quality shape)
+        :param team_a_id: id of team a
+        :param team_b_id: id of team b
+        :return: information score, higher is more informative
+        """
+        (mu_a, sigma_a), (mu_b, sigma_b) = self.ratings[team_a_id], self.ratings[team_b_id]
+        c2 = 2 * self.beta ** 2 + sigma_a ** 2 + sigma_b ** 2
+        return (sigma_a ** 2 + sigma_b ** 2) * math.exp(-(mu_a - mu_b) ** 2 / (2 * c2))
+
+    def pick_pairings(self, team_id_pairs, k):
+        """
+        Pick the k most informative pairings
+        :param team_id_pairs: list of (team a id, team b id) of the candidate pairings
+        :param k: number of pairings to pick
+        :return: indices of the picked pairings in team_id_pairs, most informative first
+        """
+        information = [self.get_information(a, b) for a, b in team_id_pairs]
+        return sorted(range(len(team_id_pairs)), key=lambda i: (-information[i], i))[:k]
+
+    def get_ranking(self):
+        """
+        Get the team ids ordered by estimated skill, best first
+        :return: list of team ids
+        """
+        return sorted(self.ratings, key=lambda team_id: self.ratings[team_id][0], reverse=True)
+
+    def get_conservative_skill(self, team_id, k=3):
+        """
+        Get a skill estimate the team is very likely above, mu - k * sigma
+        :param team_id: team id
+        :param k: number of deviations
+        :return: conservative skill
+        """
+        mu, sigma = self.ratings[team_id]
+        return mu - k * sigma
@@ -0,0 +1,406 @@
+import json
+import os
+import pickle
+import struct
+import sys
+
+import numpy as np
+
+from src.ResultsLog import read_results, TOURNAMENT_FILE
+from src.Stats import get_confidence_intervals_probability, get_confidence_intervals_expected_value_poisson
+
+# One row per match. Team ids index the header's team list, pairing ids its pairing list.
+# score_a/score_b: tournament score (3, 2, 1 or 0) of team a/b. first_team: 0 if team a played first, 1 if
+# team b did, -1 if unknown. rounds_to_win: -1 for a draw. points: points of the four seats, -1 if unknown.
+MATCH_DTYPE = np.dtype([('pairing', '<u2'),
+                        ('team_a', '<u2'),
+                        ('team_b', '<u2'),
+                        ('score_a', 'i1'),
+                        ('score_b', 'i1'),
+                        ('first_team', 'i1'),
+                        ('rounds_to_win', '<i2'),
+                        ('points', '<i2', (4,))])
+
+# File layout: magic, JSON header length, JSON header padded with spaces to a multiple of 64 bytes, rows
+STORE_MAGIC = b'TICHURS\x01'
+STORE_HEADER_LENGTH = struct.Struct('<I')
+
+# Outcome indices of the count arrays
+WIN, DRAW, LOSS = 0, 1, 2
+
+
+class ResultStore:
+    def __init__(self, header, matches):
+        """
+        Columnar tournament results: a structured array with one MATCH_DTYPE row per match and a small header
+        :param header: dict with 'agents' (strategy names), 'teams' (lists of two agent ids), 'team_ids'
+                       (team names), 'pairings' (lists of two team ids), 'matches_per_pairing' and 'duplicate'
+                       (rows 2k and 2k + 1 of a pairing are the two seatings of one deal)
+        :param matches: MATCH_DTYPE array
+        """
+        self.header = header
+        self.matches = matches
+        self.team_ids = header['team_ids']
+        self.team_index = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        self.num_teams = len(self.team_ids)
+
+    @staticmethod
+    def from_tournament(tournament):
+        """
+        Build a store from a played Tournament. Tournaments only keep aggregates, so the rows are rebuilt from
+        them: Team.scores gives the outcome of every match, in play order, and rounds_for_win the rounds of
+        the wins. The team playing first is assigned to the matches so that first_to_play/second_to_play
+        counts are reproduced, which the store marks with 'first_team_reconstructed'. Seat points are unknown.
+        This needs the matches of every pairing to be played one after another, as play does without
+        stop_confidence. Adaptive tournaments interleave the pairings: use a log_path and from_results_log.
+        Rated tournaments (see Tournament.play_rated) interleave them too and are rejected.
+        :param tournament: tournament
+        :return: result store
+        """
+        if getattr(tournament, 'stop_confidence', None) is not None:
+            raise ValueError("[ResultStore.from_tournament] The matches of an adaptive tournament are interleaved "
+                             "between pairings and cannot be rebuilt from its aggregates, play it with a log_path "
+                             "and use ResultStore.from_results_log")
+        if getattr(tournament, 'ratings', None) is not None:
+            raise ValueError("[ResultStore.from_tournament] The matches of a rated tournament are interleaved "
+                             "between pairings and cannot be rebuilt from its aggregates")
+
+        # Pairings may have played fewer matches than matches_per_pairing, and play two games per deal in
+        # duplicate play
+        counts = [pairing.get_count_of_matches_played() for pairing in tournament.pairings]
+        for team in tournament.teams:
+            if len(team.scores) != sum(count for pairing, count in zip(tournament.pairings, counts)
+                                       if team in pairing.teams):
+                raise ValueError("[ResultStore.from_tournament] The scores of " + team.get_team_id()
+                                 + " do not match the matches of its pairings")
+
+        header = ResultStore.get_header(tournament)
+        header['first_team_reconstructed'] = True
+        team_index = {team_id: i for i, team_id in enumerate(header['team_ids'])}
+
+        matches = np.zeros(sum(counts), dtype=MATCH_DTYPE)
+        matches['points'] = -1
+        scores_seen = [0] * len(tournament.teams)
+        row = 0
+        for pairing_index, pairing in enumerate(tournament.pairings):
+            team_a, team_b = pairing.teams
+            a, b = team_index[team_a.get_team_id()], team_index[team_b.get_team_id()]
+            rows = matches[row:row + counts[pairing_index]]
+            rows['pairing'] = pairing_index
+            rows['team_a'] = a
+            rows['team_b'] = b
+            rows['score_a'] = team_a.scores[scores_seen[a]:scores_seen[a] + len(rows)]
+            rows['score_b'] = team_b.scores[scores_seen[b]:scores_seen[b] + len(rows)]
+            scores_seen[a] += len(rows)
+            scores_seen[b] += len(rows)
+
+            wins_a = np.flatnonzero(rows['score_a'] > rows['score_b'])
+            wins_b = np.flatnonzero(rows['score_a'] < rows['score_b'])
+            draws = np.flatnonzero(rows['score_a'] == rows['score_b'])
+
+            rows['rounds_to_win'] = -1
+            rows['rounds_to_win'][wins_a] = team_a.rounds_for_win.get(team_b.get_team_id(), [])[:len(wins_a)]
+            rows['rounds_to_win'][wins_b] = team_b.rounds_for_win.get(team_a.get_team_id(), [])[:len(wins_b)]
+
+            # Team a played first in its first_to_play wins and draws and in team b's second_to_play wins
+            rows['first_team'] = 1
+            first_a = team_a.first_to_play.get(team_b.get_team_id(), {})
+            first_b = team_b.first_to_play.get(team_a.get_team_id(), {})
+            rows['first_team'][wins_a[:first_a.get('win', 0)]] = 0
+            rows['first_team'][draws[:first_a.get('draw', 0)]] = 0
+            rows['first_team'][wins_b[first_b.get('win', 0):]] = 0
+
+            row += len(rows)
+
+        return ResultStore(header, matches)
+
+    @staticmethod
+    def from_results_log(path):
+        """
+        Build a store from the results log of a tournament played with a log_path (see Tournament.play)
+        :param path: log_path the tournament was played with
+        :return: result store
+        """
+        with open(os.path.join(path, TOURNAMENT_FILE), 'rb') as f:
+            tournament = pickle.load(f)
+
+        header = ResultStore.get_header(tournament)
+        team_index = {team_id: i for i, team_id in enumerate(header['team_ids'])}
+
+        results = read_results(path)
+        matches = np.zeros(sum(len(pairing_results) for pairing_results in results.values()), dtype=MATCH_DTYPE)
+        row = 0
+        for pairing_index in sorted(results):
+            pairing = tournament.pairings[pairing_index]
+            pairing_results = results[pairing_index]
+            rows = matches[row:row + len(pairing_results)]
+            rows['pairing'] = pairing_index
+            rows['team_a'] = team_index[pairing.teams[0].get_team_id()]
+            rows['team_b'] = team_index[pairing.teams[1].get_team_id()]
+            rows['points'] = [game_points for game_points, _, _ in pairing_results]
+            rows['rounds_to_win'] = [rounds_to_win for _, rounds_to_win, _ in pairing_results]
+            rows['first_team'] = [first_team for _, _, first_team in pairing_results]
+            rows['score_a'], rows['score_b'] = get_scores(rows['points'])
+            rows['rounds_to_win'][rows['score_a'] == rows['score_b']] = -1
+            row += len(rows)
+
+        return ResultStore(header, matches)
+
+    @staticmethod
+    def get_header(tournament):
+        """
+        Get the header of a tournament's store: integer ids of its agents, teams and pairings
+        :param tournament: tournament
+        :return: header
+        """
+        agents = sorted({agent.strategy for team in tournament.teams for agent in team.agents})
+        agent_index = {strategy: i for i, strategy in enumerate(agents)}
+        team_ids = [team.get_team_id() for team in tournament.teams]
+        team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+
+        return {'agents': agents,
+                'teams': [[agent_index[agent.strategy] for agent in team.agents] for team in tournament.teams],
+                'team_ids': team_ids,
+                'pairings': [[team_index[team.get_team_id()] for team in pairing.teams]
+                             for pairing in tournament.pairings],
+                'matches_per_pairing': tournament.matches_per_pairing,
+                'first_team_reconstructed': False,
+                'duplicate': getattr(tournament, 'duplicate', False)}
+
+    def save(self, file_name):
+        """
+        Save the store to a file
+        :param file_name: file name
+        :return: None
+        """
+        header = dict(self.header, num_matches=len(self.matches))
+        header_bytes = json.dumps(header).encode('utf-8')
+        offset = len(STORE_MAGIC) + STORE_HEADER_LENGTH.size + len(header_bytes)
+        header_bytes += b' ' * (-offset % 64)
+
+        with open(file_name, 'wb') as f:
+            f.write(STORE_MAGIC)
+            f.write(STORE_HEADER_LENGTH.pack(len(header_bytes)))
+            f.write(header_bytes)
+            f.write(np.ascontiguousarray(self.matches, dtype=MATCH_DTYPE).tobytes())
+
+    @staticmethod
+    def load(file_name):
+        """
+        Load a store from a file, memory mapping its rows
+        :param file_name: file name
+        :return: result store
+        """
+        with open(file_name, 'rb') as f:
+            if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError("[ResultStore.load] " + file_name + " is not a result store")
+            header_length = STORE_HEADER_LENGTH.unpack(f.read(STORE_HEADER_LENGTH.size))[0]
+            header = json.loads(f.read(header_length))
+
+        num_matches = header.pop('num_matches')
+        if num_matches == 0:
+            return ResultStore(header, np.zeros(0, dtype=MATCH_DTYPE))
+
+        offset = len(STORE_MAGIC) + STORE_HEADER_LENGTH.size + header_length
+        return ResultStore(header, np.memmap(file_name, dtype=MATCH_DTYPE, mode='r', offset=offset,
+                                             shape=(num_matches,)))
+
+    def get_outcome_counts(self):
+        """
+        Get the number of wins, draws and losses of every team against every team
+        :return: array of shape (teams, teams, 3), indexed by team, against team and WIN/DRAW/LOSS
+        """
+        a, b, outcome_a = self.get_outcomes()
+        counts = np.bincount((a * self.num_teams + b) * 3 + outcome_a, minlength=self.num_teams ** 2 * 3)
+        counts += np.bincount((b * self.num_teams + a) * 3 + (2 - outcome_a), minlength=self.num_teams ** 2 * 3)
+        return counts.reshape(self.num_teams, self.num_teams, 3)
+
+    def get_outcome_counts_first_second(self):
+        """
+        Get the number of wins, draws and losses of every team against every team when starting first and second.
+        Matches with an unknown first team are left out.
+        :return: array of shape (teams, teams, 2, 3), indexed by team, against team, first (0) or second (1)
+                 and WIN/DRAW/LOSS
+        """
+        a, b, outcome_a = self.get_outcomes()
+        first_team = self.matches['first_team'].astype(np.int64)
+        known = first_team >= 0
+        a, b, outcome_a, first_team = a[known], b[known], outcome_a[known], first_team[known]
+
+        size = self.num_teams ** 2 * 6
+        counts = np.bincount(((a * self.num_teams + b) * 2 + first_team) * 3 + outcome_a, minlength=size)
+        counts += np.bincount(((b * self.num_teams + a) * 2 + 1 - first_team) * 3 + (2 - outcome_a), minlength=size)
+        return counts.reshape(self.num_teams, self.num_teams, 2, 3)
+
+    def get_outcomes(self):
+        """
+        Get team a, team b and the outcome for team a of every match
+        :return: team a ids, team b ids and WIN/DRAW/LOSS of team a
+        """
+        score_a = self.matches['score_a']
+        score_b = self.matches['score_b']
+        outcome_a = np.where(score_a > score_b, WIN, np.where(score_a == score_b, DRAW, LOSS))
+        return self.matches['team_a'].astype(np.int64), self.matches['team_b'].astype(np.int64), outcome_a
+
+    def get_games_played(self):
+        """
+        Get the number of games played by every team against every team
+        :return: array of shape (teams, teams)
+        """
+        return self.get_outcome_counts().sum(axis=2)
+
+    def get_win_probabilities(self):
+        """
+        Get the win probability of every team against every team, 0 where they did not play
+        :return: array of shape (teams, teams)
+        """
+        counts = self.get_outcome_counts()
+        return divide(counts[:, :, WIN], counts.sum(axis=2))
+
+    def get_draw_probabilities(self):
+        """
+        Get the draw probability of every team against every team, 0 where they did not play
+        :return: array of shape (teams, teams)
+        """
+        counts = self.get_outcome_counts()
+        return divide(counts[:, :, DRAW], counts.sum(axis=2))
+
+    def get_win_probabilities_first_second(self):
+        """
+        Get the win probability of every team against every team when starting first and second
+        :return: array of shape (teams, teams, 2)
+        """
+        counts = self.get_outcome_counts_first_second()
+        return divide(counts[..., WIN], counts.sum(axis=3))
+
+    def get_draw_probabilities_first_second(self):
+        """
+        Get the draw probability of every team against every team when starting first and second
+        :return: array of shape (teams, teams, 2)
+        """
+        counts = self.get_outcome_counts_first_second()
+        return divide(counts[..., DRAW], counts.sum(axis=3))
+
+    def get_win_confidence_intervals(self, confidence_level=.95):
+        """
+        Get the confidence interval of the win probability of every team against every team
+        :param confidence_level: confidence level
+        :return: lower and upper bounds, arrays of shape (teams, teams)
+        """
+        return get_confidence_intervals_probability(self.get_win_probabilities(), self.get_games_played(),
+                                                    confidence_level)
+
+    def get_draw_confidence_intervals(self, confidence_level=.95):
+        """
+        Get the confidence interval of the draw probability of every team against every team
+        :param confidence_level: confidence level
+        :return: lower and upper bounds, arrays of shape (teams, teams)
+        """
+        return get_confidence_intervals_probability(self.get_draw_probabilities(), self.get_games_played(),
+                                                    confidence_level)
+
+    def get_win_confidence_intervals_first_second(self, confidence_level=.95):
+        """
+        Get the confidence interval of the win probability of every team against every team when starting first
+        and second
+        :param confidence_level: confidence level
+        :return: lower and upper bounds, arrays of shape (teams, teams, 2)
+        """
+        return get_confidence_intervals_probability(self.get_win_probabilities_first_second(),
+                                                    self.get_outcome_counts_first_second().sum(axis=3),
+                                                    confidence_level)
+
+    def get_draw_confidence_intervals_first_second(self, confidence_level=.95):
+        """
+        Get the confidence interval of the draw probability of every team against every team when starting first
+        and second
+        :param confidence_level: confidence level
+        :return: lower and upper bounds, arrays of shape (teams, teams, 2)
+        """
+        return get_confidence_intervals_probability(self.get_draw_probabilities_first_second(),
+                                                    self.get_outcome_counts_first_second().sum(axis=3),
+                                                    confidence_level)
+
+    def get_rounds_for_win(self):
+        """
+        Get the number of wins and the average rounds to win of every team against every team
+        :return: wins and average rounds to win, arrays of shape (teams, teams)
+        """
+        a, b, outcome_a = self.get_outcomes()
+        winner = np.where(outcome_a == WIN, a, b)
+        loser = np.where(outcome_a == WIN, b, a)
+        decided = outcome_a != DRAW
+        index = winner[decided] * self.num_teams + loser[decided]
+        rounds = self.matches['rounds_to_win'][decided].astype(float)
+
+        wins = np.bincount(index, minlength=self.num_teams ** 2).reshape(self.num_teams, self.num_teams)
+        total = np.bincount(index, weights=rounds, minlength=self.num_teams ** 2).reshape(self.num_teams,
+                                                                                          self.num_teams)
+        return wins, divide(total, wins)
+
+    def get_rounds_for_win_confidence_intervals(self, confidence_level=.95):
+        """
+        Get the confidence interval of the average rounds to win of every team against every team
+        :param confidence_level: confidence level
+        :return: lower and upper bounds, arrays of shape (teams, teams)
+        """
+        wins, rounds = self.get_rounds_for_win()
+        return get_confidence_intervals_expected_value_poisson(rounds, wins, confidence_level)
+
+
+def get_scores(points):
+    """
+    Get the tournament scores of the two teams from the seat points of matches, as in
+    Tournament.update_pairing_stats: 3-0 for a one-two finish, otherwise 2-0 for the team with more points,
+    1-1 for a draw
+    :param points: seat points, array of shape (matches, 4); seats 0 and 2 are team a
+    :return: scores of team a and team b
+    """
+    points = np.asarray(points)
+    order = np.argsort(-points, axis=1, kind='stable')
+    one_two = order[:, 0] % 2 == order[:, 1] % 2
+    one_two_a = one_two & (order[:, 0] % 2 == 0)
+    one_two_b = one_two & (order[:, 0] % 2 == 1)
+
+    total_a = points[:, 0] + points[:, 2]
+    total_b = points[:, 1] + points[:, 3]
+    score_a = np.where(total_a > total_b, 2, np.where(total_a == total_b, 1, 0))
+    score_b = np.where(total_b > total_a, 2, np.where(total_a == total_b, 1, 0))
+
+    score_a = np.where(one_two_a, 3, np.where(one_two_b, 0, score_a))
+    score_b = np.where(one_two_b, 3, np.where(one_two_a, 0, score_b))
+    return score_a, score_b
+
+
+def divide(x, n):
+    """
+    Divide element-wise, 0 where n is 0
+    :param x: numerators
+    :param n: denominators
+    :return: quotients
+    """
+    return np.divide(x, n, out=np.zeros(np.broadcast(x, n).shape), where=n > 0)
+
+
+def convert_tournament_file(tournament_file, store_file):
+    """
+    Convert a pickled Tournament (.tichu) to a result store file
+    :param tournament_file: pickled tournament
+    :param store_file: result store file to write
+    :return: result store
+    """
+    with open(tournament_file, 'rb') as f:
+        tournament = pickle.load(f)
+
+    store = ResultStore.from_tournament(tournament)
+    store.save(store_file)
+    return store
+
+
+if __name__ == "__main__":
+    # python -m src.ResultStore tournament1.tichu tournament1.results
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.ResultStore <tournament.tichu> <store file>")
+        sys.exit(1)
+
+    convert_tournament_file(sys.argv[1], sys.argv[2])
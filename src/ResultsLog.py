@@ -0,0 +1,133 @@
+import json
+import os
+import struct
+
+# Match result record: pairing index, match index within the pairing, points of the four seats,
+# rounds to win and index of the team playing first
+RESULT_RECORD = struct.Struct('<HI4hhB')
+
+RESULTS_FILE = 'results.log'
+CHECKPOINT_FILE = 'checkpoint.json'
+TOURNAMENT_FILE = 'tournament.tichu'
+
+
+class ResultsLog:
+    def __init__(self, path, buffer_size=1024):
+        """
+        Append-only log of match results in directory path, with a per-pairing checkpoint. Results are
+        written in batches; the checkpoint only advances once a batch is on disk, so results past it
+        (e.g. written just before a crash) are ignored when the log is read back
+        :param path: directory of the log
+        :param buffer_size: number of results per batch
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.checkpoint = read_checkpoint(path)
+        self.pending = {}
+
+        # Drop a torn record at the end of the file, so new records stay aligned
+        results_path = os.path.join(path, RESULTS_FILE)
+        if os.path.exists(results_path):
+            size = os.path.getsize(results_path)
+            if size % RESULT_RECORD.size:
+                with open(results_path, 'r+b') as f:
+                    f.truncate(size - size % RESULT_RECORD.size)
+        self.file = open(results_path, 'ab')
+
+    def append(self, pairing_index, match_index, game_points, rounds_to_win, first_team):
+        """
+        Append the result of a match
+        :param pairing_index: index of the pairing in Tournament.pairings
+        :param match_index: index of the match within the pairing, of the game in duplicate play
+        :param game_points: points of the four seats
+        :param rounds_to_win: number of rounds to win
+        :param first_team: index of the team playing first
+        :return: None
+        """
+        self.buffer.append(RESULT_RECORD.pack(pairing_index, match_index, *game_points, rounds_to_win, first_team))
+        self.pending[pairing_index] = match_index + 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered results to disk, then advance the checkpoint
+        :return: None
+        """
+        if self.buffer:
+            self.file.write(b''.join(self.buffer))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.buffer = []
+
+        if self.pending:
+            self.checkpoint.update(self.pending)
+            self.pending = {}
+            write_checkpoint(self.path, self.checkpoint)
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_checkpoint(path):
+    """
+    Read the checkpoint of a results log
+    :param path: directory of the log
+    :return: dict of pairing index to number of matches on disk
+    """
+    checkpoint_path = os.path.join(path, CHECKPOINT_FILE)
+    if not os.path.exists(checkpoint_path):
+        return {}
+
+    with open(checkpoint_path) as f:
+        return {int(pairing_index): count for pairing_index, count in json.load(f).items()}
+
+
+def write_checkpoint(path, checkpoint):
+    """
+    Replace the checkpoint of a results log atomically
+    :param path: directory of the log
+    :param checkpoint: dict of pairing index to number of matches on disk
+    :return: None
+    """
+    checkpoint_path = os.path.join(path, CHECKPOINT_FILE)
+    with open(checkpoint_path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(checkpoint_path + '.tmp', checkpoint_path)
+
+
+def read_results(path):
+    """
+    Read the checkpointed results of a results log
+    :param path: directory of the log
+    :return: dict of pairing index to the list of (game_points, rounds_to_win, first_team) of its matches,
+             in match order
+    """
+    checkpoint = read_checkpoint(path)
+    results = {pairing_index: [None] * count for pairing_index, count in checkpoint.items()}
+
+    results_path = os.path.join(path, RESULTS_FILE)
+    if os.path.exists(results_path):
+        with open(results_path, 'rb') as f:
+            data = f.read()
+        for record in RESULT_RECORD.iter_unpack(data[:len(data) - len(data) % RESULT_RECORD.size]):
+            pairing_index, match_index = record[0], record[1]
+            if match_index < checkpoint.get(pairing_index, 0):
+                results[pairing_index][match_index] = (record[2:6], record[6], record[7])
+
+    for pairing_index, pairing_results in results.items():
+        if None in pairing_results:
+            raise ValueError("[read_results] Missing results of pairing " + str(pairing_index))
+
+    return results
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from scipy import stats
 
 def binomial_distribution(n, p, k):
@@ -29,6 +31,13 @@ def get_confidence_interval_probability(p, n, confidence_level=.95):
     :param confidence_level: confidence level
     :return: confidence interval
     """
+    if n == 0:
+        return 0, 0
+
+    # A probability of 0 or 1 has no spread, scipy would give nan bounds
+    if p * (1 - p) <= 0:
+        return round(p, 5), round(p, 5)
+
     # Calculate the confidence interval
     interval = stats.norm.interval(confidence_level, loc=p, scale=math.sqrt(p * (1 - p) / n))
 
@@ -47,4 +56,58 @@ def get_confidence_interval_expected_value_poisson(x, n, confidence_level=.95):
     interval = stats.norm.interval(confidence_level, loc=x, scale=math.sqrt(x / n))
 
     # Round to 5 decimal places and return
-    return round(interval[0], 5), round(interval[1], 5)
\ No newline at end of file
+    return round(interval[0], 5), round(interval[1], 5)
+
+def get_confidence_interval_paired_difference(mean, variance, n, confidence_level=.95):
+    """
+    Get the confidence interval for the mean of paired differences with a given confidence level, e.g. the
+    results of two games played on the same cards. The pairing removes the variance the two games share,
+    so variance is the sample variance of the differences themselves.
+    :param mean: mean of the differences
+    :param variance: sample variance of the differences
+    :param n: number of pairs
+    :param confidence_level: confidence level
+    :return: confidence interval
+    """
+    if variance <= 0:
+        return round(mean, 5), round(mean, 5)
+
+    # Calculate the confidence interval
+    interval = stats.norm.interval(confidence_level, loc=mean, scale=math.sqrt(variance / n))
+
+    # Round to 5 decimal places and return
+    return round(interval[0], 5), round(interval[1], 5)
+
+def get_confidence_intervals_probability(p, n, confidence_level=.95):
+    """
+    Vectorized get_confidence_interval_probability for arrays of probabilities and numbers of trials
+    :param p: probabilities
+    :param n: numbers of trials, entries without trials get the interval (p, p)
+    :param confidence_level: confidence level
+    :return: lower and upper bounds of the confidence intervals
+    """
+    p = np.asarray(p, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = stats.norm.ppf((1 + confidence_level) / 2)
+    variance = np.divide(p * (1 - p), n, out=np.zeros(np.broadcast(p, n).shape), where=n > 0)
+    half_width = z * np.sqrt(variance)
+
+    # Round to 5 decimal places and return
+    return np.round(p - half_width, 5), np.round(p + half_width, 5)
+
+def get_confidence_intervals_expected_value_poisson(x, n, confidence_level=.95):
+    """
+    Vectorized get_confidence_interval_expected_value_poisson for arrays of expected values and numbers of trials
+    :param x: expected values (Lamda of poisson distribution)
+    :param n: numbers of trials, entries without trials get the interval (x, x)
+    :param confidence_level: confidence level
+    :return: lower and upper bounds of the confidence intervals
+    """
+    x = np.asarray(x, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = stats.norm.ppf((1 + confidence_level) / 2)
+    variance = np.divide(x, n, out=np.zeros(np.broadcast(x, n).shape), where=n > 0)
+    half_width = z * np.sqrt(variance)
+
+    # Round to 5 decimal places and return
+    return np.round(x - half_width, 5), np.round(x + half_width, 5)
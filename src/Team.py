@@ -1,8 +1,8 @@
 from plotly import graph_objects as go
 from plotly.subplots import make_subplots
 
-from src.Stats import poison_distribution, \
-    get_confidence_interval_probability, get_confidence_interval_expected_value_poisson
+from src.Stats import poison_distribution, get_confidence_interval_probability, \
+    get_confidence_interval_expected_value_poisson, get_confidence_interval_paired_difference
 
 
 class Team:
@@ -21,17 +21,29 @@ class Team:
         self.second_to_play = {}
         self.rounds_for_win = {}
 
+        # Duplicate play: number, sum and sum of squares of the paired differences against each team
+        self.paired_results = {}
+
     def get_total_games_played_first_second(self, against_team_id):
         """
         Get total number of games played when starting first or second against a given team
         :param against_team_id: team id
         :return: total number of games played
         """
-        if against_team_id not in self.first_to_play or against_team_id not in self.second_to_play:
-            return (0, 0), (0, 0)
+        # A team may have only played first, or only second, against a team, e.g. after adaptive stopping
+        first_to_play = self.first_to_play.get(against_team_id, {})
+        second_to_play = self.second_to_play.get(against_team_id, {})
+
+        return sum(first_to_play.values()), sum(second_to_play.values())
 
-        return self.first_to_play[against_team_id]['win'] + self.first_to_play[against_team_id]['loss'] + self.first_to_play[against_team_id]['draw'], \
-               self.second_to_play[against_team_id]['win'] + self.second_to_play[against_team_id]['loss'] + self.second_to_play[against_team_id]['draw']
+    def get_games_played_against(self, against_team_id):
+        """
+        Get the number of games played against a given team
+        :param against_team_id: team id
+        :return: number of games played
+        """
+        n_first, n_second = self.get_total_games_played_first_second(against_team_id)
+        return n_first + n_second
 
     def get_win_probability_first_second(self, against_team_id):
         """
@@ -42,12 +54,13 @@ class Team:
         if against_team_id not in self.wins:
             return 0, 0
 
-        first_to_play = self.first_to_play[against_team_id]
-        second_to_play = self.second_to_play[against_team_id]
+        first_to_play = self.first_to_play.get(against_team_id, {})
+        second_to_play = self.second_to_play.get(against_team_id, {})
 
         n_first, n_second = self.get_total_games_played_first_second(against_team_id)
 
-        return first_to_play["win"] / n_first, second_to_play["win"] / n_second
+        return first_to_play.get("win", 0) / n_first if n_first else 0, \
+            second_to_play.get("win", 0) / n_second if n_second else 0
 
 
     def get_draw_probability_first_second(self, against_team_id):
@@ -56,15 +69,16 @@ class Team:
         :param against_team_id: team id
         :return: draw probability when starting first and when starting second
         """
-        if against_team_id not in self.first_to_play or against_team_id not in self.second_to_play:
+        if against_team_id not in self.draws:
             return 0, 0
 
-        first_to_play = self.first_to_play[against_team_id]
-        second_to_play = self.second_to_play[against_team_id]
+        first_to_play = self.first_to_play.get(against_team_id, {})
+        second_to_play = self.second_to_play.get(against_team_id, {})
 
         n_first, n_second = self.get_total_games_played_first_second(against_team_id)
 
-        return first_to_play["draw"] / n_first, second_to_play["draw"] / n_second
+        return first_to_play.get("draw", 0) / n_first if n_first else 0, \
+            second_to_play.get("draw", 0) / n_second if n_second else 0
 
     def get_win_confidence_interval_first_second(self, against_team_id, confidence_level=.95):
         """
@@ -124,6 +138,68 @@ class Team:
 
         self.rounds_for_win[against_team.get_team_id()].append(rounds)
 
+    def add_paired_result(self, difference, against_team):
+        """
+        Add the paired result of a duplicate deal against a given team: the team's results (1 win, 0.5 draw, 0 loss)
+        on both seatings of the same cards, minus 1. It is positive when the team did better with the cards than
+        the other team did with the same cards.
+        :param difference: paired difference, between -1 and 1
+        :param against_team: team
+        :return: None
+        """
+        if against_team.get_team_id() not in self.paired_results:
+            self.paired_results[against_team.get_team_id()] = [0, 0., 0.]
+
+        paired_result = self.paired_results[against_team.get_team_id()]
+        paired_result[0] += 1
+        paired_result[1] += difference
+        paired_result[2] += difference * difference
+
+    def get_paired_difference(self, against_team_id):
+        """
+        Get the number of duplicate deals and the mean and sample variance of their paired differences against a
+        given team
+        :param against_team_id: team id
+        :return: number of deals, mean, sample variance
+        """
+        paired_results = getattr(self, 'paired_results', {})
+        if against_team_id not in paired_results:
+            return 0, 0, 0
+
+        n, total, total_squares = paired_results[against_team_id]
+        mean = total / n
+        variance = (total_squares - n * mean * mean) / (n - 1) if n > 1 else 0
+        return n, mean, max(variance, 0)
+
+    def get_paired_win_probability(self, against_team_id):
+        """
+        Get the win probability against a given team from duplicate deals, draws counted as half: each deal is
+        one paired observation of (1 + difference) / 2
+        :param against_team_id: team id
+        :return: probability of a win
+        """
+        n, mean, _ = self.get_paired_difference(against_team_id)
+        if n == 0:
+            return 0
+
+        return (1 + mean) / 2
+
+    def get_paired_win_confidence_interval(self, against_team_id, confidence_level=.95):
+        """
+        Get the confidence interval for the win probability against a given team from duplicate deals, with a given
+        confidence level. Uses the variance of the paired differences, so card luck shared by both seatings of a
+        deal does not widen it.
+        :param against_team_id: team id
+        :param confidence_level: confidence level
+        :return: confidence interval
+        """
+        n, mean, variance = self.get_paired_difference(against_team_id)
+        if n == 0:
+            return 0, 0
+
+        lower, upper = get_confidence_interval_paired_difference(mean, variance, n, confidence_level)
+        return round((1 + lower) / 2, 5), round((1 + upper) / 2, 5)
+
     def add_win(self, against_team):
         """
         Add a win against a given team
@@ -176,10 +252,11 @@ class Team:
         :param against_team_id: team id
         :return: probability of a win
         """
-        if against_team_id not in self.wins:
+        n = self.get_games_played_against(against_team_id)
+        if against_team_id not in self.wins or n == 0:
             return 0
 
-        return self.wins[against_team_id] / self.matches_per_pairing
+        return self.wins[against_team_id] / n
 
     def get_draw_probability(self, against_team_id):
         """
@@ -187,18 +264,23 @@ class Team:
         :param against_team_id: team id
         :return: probability of a draw
         """
-        if against_team_id not in self.draws:
+        n = self.get_games_played_against(against_team_id)
+        if against_team_id not in self.draws or n == 0:
             return 0
 
         # get difference of the two win probabilities
-        return self.draws[against_team_id] / self.matches_per_pairing
+        return self.draws[against_team_id] / n
 
     def get_overall_win_probability(self):
         """
         Get the overall win probability
         :return: overall win probability
         """
-        return sum(self.wins.values()) / (self.matches_per_pairing * len(self.wins))
+        n = sum(self.get_games_played_against(team_id) for team_id in self.wins)
+        if n == 0:
+            return 0
+
+        return sum(self.wins.values()) / n
 
     def plot_probabilities_simple(self, against_teams, confidence_level):
         """
@@ -336,11 +418,11 @@ class Team:
         :param confidence_level: confidence level
         :return: confidence interval
         """
-        if against_team_id not in self.wins:
+        n = self.get_games_played_against(against_team_id)
+        if against_team_id not in self.wins or n == 0:
             return 0, 0
 
         p = self.get_win_probability(against_team_id)
-        n = self.matches_per_pairing
 
         # Calculate the confidence interval
         return get_confidence_interval_probability(p, n, confidence_level)
@@ -352,11 +434,11 @@ class Team:
         :param confidence_level: confidence level
         :return: confidence interval
         """
-        if against_team_id not in self.draws:
+        n = self.get_games_played_against(against_team_id)
+        if against_team_id not in self.draws or n == 0:
             return 0, 0
 
         p = self.get_draw_probability(against_team_id)
-        n = self.matches_per_pairing
 
         # Calculate the confidence interval
         return get_confidence_interval_probability(p, n, confidence_level)
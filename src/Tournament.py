@@ -1,39 +1,423 @@
+import os
 import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from tqdm.notebook import tqdm
 
 from src.Pairing import Pairing
+from src.Rating import Rating
+from src.ResultsLog import ResultsLog, read_results, TOURNAMENT_FILE
+from src.Stats import get_confidence_interval_probability
 from src.Team import Team
 from tichu.TichuEnv import TichuEnv
 
+
+def get_unit_seed(seed, pairing_index, start):
+    """
+    Get the seed of a work unit, derived only from the tournament seed and the unit's position
+    :param seed: tournament seed
+    :param pairing_index: index of the pairing
+    :param start: index of the first match of the unit within the pairing
+    :return: seed of the work unit
+    """
+    return int(np.random.SeedSequence([seed, pairing_index, start]).generate_state(1)[0])
+
+
+def get_deal_and_agent_seeds(unit_seed):
+    """
+    Get two independent seeds from the seed of a work unit: one for the deals and one for the global random
+    module the agents draw from. Seeding both with the same value would give two identical random streams, and
+    the agents' choices would be correlated with the shuffles.
+    :param unit_seed: seed of the work unit
+    :return: deal seed, agent seed
+    """
+    deal_seed, agent_seed = np.random.SeedSequence(unit_seed).generate_state(2)
+    return int(deal_seed), int(agent_seed)
+
+
+def play_matches(agents, team_names, num_matches, unit_seed, duplicate=False):
+    """
+    Play a work unit of matches of one pairing. The deals and the agents' random choices are seeded with two
+    independent seeds derived from unit_seed (see get_deal_and_agent_seeds), so a unit gives the same results in
+    any process.
+    In duplicate mode a match is one seeded deal played twice: as seated, then with the same hands per seat and
+    the teams swapped between the seat pairs 0/2 and 1/3. The second game's points are given back in the
+    pairing's seat order (team 0 on seats 0/2).
+    :param agents: agents of the pairing, in seat order
+    :param team_names: names of the two teams
+    :param num_matches: number of matches to play
+    :param unit_seed: seed of the work unit
+    :param duplicate: play every deal twice with the teams swapped
+    :return: list of (game_points, rounds_to_win, index of the team playing first) tuples, two per match in
+             duplicate mode
+    """
+    deal_seed, agent_seed = get_deal_and_agent_seeds(unit_seed)
+    random_state = random.getstate()
+    random.seed(agent_seed)
+    try:
+        env = TichuEnv(seed=deal_seed)
+        env.set_agents(agents)
+        env.set_team_names(team_names)
+
+        if duplicate:
+            swapped_env = TichuEnv()
+            swapped_env.set_agents([agents[1], agents[0], agents[3], agents[2]])
+            swapped_env.set_team_names([team_names[1], team_names[0]])
+
+        results = []
+        for _ in range(num_matches):
+            game_points, _, rounds_to_win, positional_outcome = env.run()
+            results.append((tuple(game_points), rounds_to_win, 0 if positional_outcome[team_names[0]] == 1 else 1))
+
+            if duplicate:
+                game_points, _, rounds_to_win, positional_outcome = swapped_env.run(deal=env.game.deal_masks)
+                results.append(((game_points[1], game_points[0], game_points[3], game_points[2]), rounds_to_win,
+                                0 if positional_outcome[team_names[0]] == 1 else 1))
+        return results
+    finally:
+        random.setstate(random_state)
+
+
 class Tournament:
     def __init__(self, available_agents, matches_per_pairing=100, verbose=False):
         self.teams = Tournament.create_all_possible_teams_from_agents(available_agents, matches_per_pairing)
         self.pairings = Tournament.create_all_possible_pairings(self.teams)
         self.matches_per_pairing = matches_per_pairing
+        self.stop_confidence = None
+        self.duplicate = False
+
+    def play(self, recorder=None, seed=None, num_workers=None, chunk_size=100, log_path=None, stop_confidence=None,
+             duplicate=False):
+        """
+        Play the tournament and update the statistics of each team and pairing.
+        Without seed, num_workers, log_path and stop_confidence, all matches are played in this process on the
+        global random state. Otherwise the matches are cut into (pairing, chunk of matches) work units with their
+        own seeds, played in num_workers processes (in this process when num_workers is None). The results are
+        folded in unit order, so they only depend on the seed and chunk_size, not on num_workers.
+        With stop_confidence, matches_per_pairing is an upper bound: the pairings are played one unit per round
+        and a pairing stops as soon as it is decided at that confidence level, see is_pairing_decided.
+        With duplicate, every match is a seeded deal played twice with the teams swapped between the seat pairs,
+        so a pairing plays 2 * matches_per_pairing games. Both games update the usual statistics, and the deal
+        adds a paired result to both teams (see Team.add_paired_result), which adaptive stopping then uses.
+        :param recorder: optional GameRecorder receiving a record of every match, only for unseeded serial play
+        :param seed: tournament seed, drawn at random when not given for seeded play
+        :param num_workers: number of worker processes
+        :param chunk_size: number of matches per work unit
+        :param log_path: optional directory where every result is logged as it is played, see resume
+        :param stop_confidence: optional confidence level at which a pairing is decided and stops
+        :param duplicate: play every deal twice with the teams swapped, not with a log_path
+        :return: None
+        """
+        if seed is None and num_workers is None and log_path is None and stop_confidence is None and not duplicate:
+            self.play_serial(recorder)
+            return
+
+        if recorder is not None:
+            raise ValueError("[Tournament.play] recorder needs unseeded serial play")
+        if chunk_size < 1:
+            raise ValueError("[Tournament.play] chunk_size must be positive")
+        if duplicate and log_path is not None:
+            raise ValueError("[Tournament.play] duplicate play cannot be logged")
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.stop_confidence = stop_confidence
+        self.duplicate = duplicate
+        if log_path is None:
+            self.schedule_units(self.get_work_units(seed, chunk_size), num_workers)
+            return
+
+        # Keep the tournament before any match is played, resume rebuilds the statistics on top of it
+        if os.path.exists(os.path.join(log_path, TOURNAMENT_FILE)):
+            raise ValueError("[Tournament.play] " + log_path + " already holds a tournament, use Tournament.resume")
+        os.makedirs(log_path, exist_ok=True)
+        with open(os.path.join(log_path, TOURNAMENT_FILE), 'wb') as f:
+            pickle.dump(self, f)
+
+        with ResultsLog(log_path) as results_log:
+            self.schedule_units(self.get_work_units(seed, chunk_size), num_workers, results_log)
+
+    @staticmethod
+    def resume(path, num_workers=None):
+        """
+        Resume a tournament played with a log_path: rebuild the statistics from the logged results and play
+        the matches that are not in the log yet. Every work unit is folded in play order, logged matches first,
+        so the statistics (including the order of Team.scores) end up the same as for an uninterrupted run.
+        :param path: log_path the tournament was played with
+        :param num_workers: number of worker processes
+        :return: tournament
+        """
+        with open(os.path.join(path, TOURNAMENT_FILE), 'rb') as f:
+            tournament = pickle.load(f)
+
+        # Every unit is folded in play order: its logged matches from the log, then the ones left to play
+        results = read_results(path)
+        with ResultsLog(path) as results_log:
+            tournament.schedule_units(tournament.get_work_units(tournament.seed, tournament.chunk_size), num_workers,
+                                      results_log, results)
 
-    def play(self):
+        return tournament
+
+    def play_rated(self, num_matches, seed=None, num_workers=None, chunk_size=20, pairings_per_round=4):
+        """
+        Rate the teams instead of playing the full round robin. Every round, the pairings_per_round most
+        informative pairings according to the current ratings (close ratings, high uncertainty) play chunk_size
+        seeded matches each. Every match updates the team and pairing statistics, and the ratings in O(1).
+        The results only depend on the seed, chunk_size and pairings_per_round, not on num_workers.
+        :param num_matches: number of matches to play in total
+        :param seed: tournament seed, drawn at random when not given
+        :param num_workers: number of worker processes, None to play in this process
+        :param chunk_size: number of matches a picked pairing plays per round
+        :param pairings_per_round: number of pairings picked per round
+        :return: ratings
+        """
+        if chunk_size < 1 or pairings_per_round < 1:
+            raise ValueError("[Tournament.play_rated] chunk_size and pairings_per_round must be positive")
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        self.seed = seed
+        self.ratings = Rating([team.get_team_id() for team in self.teams])
+        team_id_pairs = [(pairing.teams[0].get_team_id(), pairing.teams[1].get_team_id()) for pairing in self.pairings]
+
+        executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers is not None else None
+        progress = tqdm(total=num_matches)
+        try:
+            played = 0
+            while played < num_matches:
+                units = []
+                for pairing_index in self.ratings.pick_pairings(team_id_pairs, pairings_per_round):
+                    if played >= num_matches:
+                        break
+                    pairing = self.pairings[pairing_index]
+                    start = pairing.get_count_of_matches_played()
+                    unit_matches = min(chunk_size, num_matches - played)
+                    units.append((pairing_index, pairing.get_agent_list(), list(team_id_pairs[pairing_index]),
+                                  unit_matches, get_unit_seed(seed, pairing_index, start), start, pairing))
+                    played += unit_matches
+
+                self.play_units(units, executor, on_result=self.update_ratings, progress=progress)
+        finally:
+            progress.close()
+            if executor is not None:
+                executor.shutdown()
+
+        return self.ratings
+
+    def update_ratings(self, pairing, team_names):
         """
-        Play the tournament and update the statistics of each team and pairing
+        Update the ratings with the match just folded into the statistics of a pairing
+        :param pairing: pairing
+        :param team_names: names of the two teams, in seat order
+        :return: None
+        """
+        # The scores just appended by update_pairing_stats give the outcome
+        team_a, team_b = pairing.teams
+        outcome = team_a.scores[-1] - team_b.scores[-1]
+        self.ratings.update(team_names[0], team_names[1], (outcome > 0) - (outcome < 0))
+
+    def play_serial(self, recorder=None):
+        """
+        Play all matches in this process, reusing one environment per pairing
+        :param recorder: optional GameRecorder receiving a record of every match
         :return: None
         """
 
         # Play all pairings
         for pairing in tqdm(self.pairings):
-            for _ in range(self.matches_per_pairing):
-                # Create the game
-                pairing_env = TichuEnv()
-                pairing_env.set_agents(pairing.get_agent_list())
-                pairing_env.set_team_names([pairing.teams[0].__str__(), pairing.teams[1].__str__()])
+            # Create the game, reused for all matches of the pairing
+            pairing_env = TichuEnv(recorder=recorder)
+            pairing_env.set_agents(pairing.get_agent_list())
+            pairing_env.set_team_names([pairing.teams[0].__str__(), pairing.teams[1].__str__()])
 
+            for _ in range(self.matches_per_pairing):
                 # Play the game
                 game_points, accumulated_points_per_round, rounds_to_win, positional_outcome = pairing_env.run()
 
                 # Update the statistics of the teams
                 self.update_pairing_stats(pairing, game_points, rounds_to_win, positional_outcome)
 
+    def get_work_units(self, seed, chunk_size):
+        """
+        Cut the matches of every pairing into work units
+        :param seed: tournament seed
+        :param chunk_size: number of matches per work unit
+        :return: list of (pairing index, agents, team names, number of matches, unit seed, start, pairing)
+                 tuples, in play order. The first four fields are the arguments of play_matches.
+        """
+        units = []
+        for pairing_index, pairing in enumerate(self.pairings):
+            team_names = [pairing.teams[0].__str__(), pairing.teams[1].__str__()]
+            for start in range(0, self.matches_per_pairing, chunk_size):
+                units.append((pairing_index, pairing.get_agent_list(), team_names,
+                              min(chunk_size, self.matches_per_pairing - start),
+                              get_unit_seed(seed, pairing_index, start), start, pairing))
+        return units
+
+    def schedule_units(self, units, num_workers=None, results_log=None, logged_results=None):
+        """
+        Play work units and fold their results. Without stop_confidence the units are played in order. With it,
+        every round plays the next unit of each undecided pairing, so later rounds only spend games on close
+        pairings; a pairing is left once it is decided or out of units.
+        :param units: work units, as returned by get_work_units
+        :param num_workers: number of worker processes, None to play in this process
+        :param results_log: optional ResultsLog receiving every result
+        :param logged_results: logged results, per pairing index; these matches of a unit are folded from the log
+                               instead of being played again
+        :return: None
+        """
+        # Tournaments pickled before stop_confidence and duplicate existed play every unit once
+        stop_confidence = getattr(self, 'stop_confidence', None)
+        paired = getattr(self, 'duplicate', False)
+        executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers is not None else None
+        try:
+            if stop_confidence is None:
+                self.play_units(units, executor, results_log, logged_results)
+                return
+
+            pending = {}
+            for unit in units:
+                pending.setdefault(unit[0], []).append(unit)
+
+            while pending:
+                self.play_units([pending[pairing_index].pop(0) for pairing_index in sorted(pending)], executor,
+                                results_log, logged_results)
+                if results_log is not None:
+                    results_log.flush()
+
+                for pairing_index in list(pending):
+                    if not pending[pairing_index] or \
+                            self.is_pairing_decided(self.pairings[pairing_index], stop_confidence, paired):
+                        del pending[pairing_index]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def play_units(self, units, executor=None, results_log=None, logged_results=None, on_result=None,
+                   progress=None):
+        """
+        Play work units and fold their results
+        :param units: work units, as returned by get_work_units
+        :param executor: executor playing the units, None to play them in this process
+        :param results_log: optional ResultsLog receiving every result
+        :param logged_results: logged results, per pairing index; these matches of a unit are folded from the log,
+                               and units that are entirely logged are not played
+        :param on_result: optional function called with the pairing and team names after every folded match
+        :param progress: optional progress bar to update, see fold_results
+        :return: None
+        """
+        if logged_results is None:
+            logged_results = {}
+        logged_units = [len(logged_results.get(unit[0], [])) >= sum(self.get_unit_games(unit)) for unit in units]
+        played_units = [unit for unit, logged in zip(units, logged_units) if not logged]
+        arguments = list(zip(*[unit[1:5] for unit in played_units])) if played_units else [[]] * 4
+        arguments.append([getattr(self, 'duplicate', False)] * len(played_units))
+        played = map(play_matches, *arguments) if executor is None else executor.map(play_matches, *arguments)
+
+        # Entirely logged units have no results of their own, fold_results takes all their matches from the log
+        results = ([] if logged else next(played) for logged in logged_units)
+        self.fold_results(units, results, results_log, logged_results, on_result, progress)
+
+    @staticmethod
+    def is_pairing_decided(pairing, confidence_level, paired=False):
+        """
+        Check whether the stronger team of a pairing is known at a given confidence level: the confidence interval
+        of the first team's win probability over the decisive (not drawn) games excludes 1/2. When one team won
+        all n of them, the normal interval is degenerate and the exact upper bound 1 - (1 - confidence_level) ** (1 / n)
+        on the other team's win probability is used instead.
+        With paired, the paired win probability interval of the duplicate deals is used (see
+        Team.get_paired_win_confidence_interval), with the same exact bound when every deal ended alike.
+        :param pairing: pairing
+        :param confidence_level: confidence level
+        :param paired: use the paired results of duplicate play
+        :return: True if the pairing is decided
+        """
+        team_a, team_b = pairing.teams
+        if paired:
+            n, mean, variance = team_a.get_paired_difference(team_b.get_team_id())
+            if n < 2:
+                return False
+            if variance == 0:
+                return mean != 0 and 1 - (1 - confidence_level) ** (1 / n) < .5
+
+            lower, upper = team_a.get_paired_win_confidence_interval(team_b.get_team_id(), confidence_level)
+            return lower > .5 or upper < .5
+
+        wins_a = team_a.wins.get(team_b.get_team_id(), 0)
+        wins_b = team_b.wins.get(team_a.get_team_id(), 0)
+        n = wins_a + wins_b
+        if n == 0:
+            return False
+
+        if wins_a == 0 or wins_b == 0:
+            return 1 - (1 - confidence_level) ** (1 / n) < .5
+
+        lower, upper = get_confidence_interval_probability(wins_a / n, n, confidence_level)
+        return lower > .5 or upper < .5
+
+    def get_unit_games(self, unit):
+        """
+        Get the games of a work unit within its pairing, as indexed in the results log: every match of a unit is
+        two games in duplicate play
+        :param unit: work unit, as returned by get_work_units
+        :return: index of the unit's first game, number of games
+        """
+        games_per_match = 2 if getattr(self, 'duplicate', False) else 1
+        return games_per_match * unit[5], games_per_match * unit[3]
+
+    def fold_results(self, units, results, results_log=None, logged_results=None, on_result=None, progress=None):
+        """
+        Fold the results of the work units into the statistics of the teams and pairings
+        :param units: work units, as returned by get_work_units
+        :param results: result list of every unit, in the same order
+        :param results_log: optional ResultsLog receiving every folded result that is not logged yet
+        :param logged_results: logged results, per pairing index; these games of a unit are folded from the log
+                               in place of the unit's own results, which may leave them out
+        :param on_result: optional function called with the pairing and team names after every folded match
+        :param progress: optional progress bar updated with the number of results of every unit, instead of a new
+                         progress bar over the units
+        :return: None
+        """
+        if progress is None:
+            results = tqdm(results, total=len(units))
+        for unit, unit_results in zip(units, results):
+            pairing_index, team_names, start, pairing = unit[0], unit[2], unit[5], unit[6]
+            first_game, num_games = self.get_unit_games(unit)
+            logged = []
+            if logged_results is not None:
+                logged = logged_results.get(pairing_index, [])[first_game:first_game + num_games]
+
+            team_a, team_b = pairing.teams
+            for i, (game_points, rounds_to_win, first_team) in enumerate(logged + unit_results[len(logged):],
+                                                                         first_game):
+                positional_outcome = {team_names[first_team]: 1, team_names[1 - first_team]: 0}
+                self.update_pairing_stats(pairing, game_points, rounds_to_win, positional_outcome)
+                if on_result is not None:
+                    on_result(pairing, team_names)
+                if results_log is not None and i >= first_game + len(logged):
+                    results_log.append(pairing_index, i, game_points, rounds_to_win, first_team)
+
+                # Duplicate play: the results come in pairs of games on the same cards
+                if getattr(self, 'duplicate', False):
+                    result = (1 + (team_a.scores[-1] > team_b.scores[-1]) - (team_a.scores[-1] < team_b.scores[-1])) / 2
+                    if (i - first_game) % 2 == 0:
+                        first_result = result
+                    else:
+                        team_a.add_paired_result(first_result + result - 1, team_b)
+                        team_b.add_paired_result(1 - first_result - result, team_a)
+
+            # Checkpoint once a pairing is complete
+            if results_log is not None and start + unit[3] == self.matches_per_pairing:
+                results_log.flush()
+            if progress is not None:
+                progress.update(unit[3])
+
     def get_top_three_teams(self):
         """
         Get the top three teams
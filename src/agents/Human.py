@@ -1,4 +1,4 @@
-import sys
+from tichu.Renderer import clear_lines, render_state, show
 
 
 class Human:
@@ -6,25 +6,26 @@ class Human:
         self.strategy = "Human"
 
     def play(self, play):
-        print('\n')
-        print('*** Card num [player1] ' + str(play.card_num[1]) + ' [player2] ' + str(
-            play.card_num[2]) + ' [player3] ' + str(play.card_num[3]))
-        print('*** Player hand')
-        play.hand.show()
-        for i in range(len(play.legal_actions)):
-            print('*** (' + str(i) + ') ' + play.legal_actions[i].type)
-            play.legal_actions[i].show()
+        frame = render_state(play)
+        show(frame)
+        num_lines = frame.count('\n')
         while True:
+            p_input = input('*** Choose cards :')
             try:
-                p_input = input('*** Choose cards :')
-                if int(p_input) == 999:
-                    # sys.exit()
-                    break
-                else:
-                    for i in range(len(play.legal_actions) * 6 + 6):
-                        sys.stdout.write("\033[F")
-                        sys.stdout.write("\033[K")
-                    return play.legal_actions[int(p_input)]
+                choice = int(p_input)
+            except ValueError:
+                choice = None
+
+            if choice == 999:
+                # sys.exit()
                 break
-            except:
-                pass
+
+            if choice is not None and 0 <= choice < len(play.legal_actions):
+                # Clear the frame and the input line in a single write
+                show(clear_lines(num_lines + 1))
+                return play.legal_actions[choice]
+
+            # Invalid choice: redraw the frame with a hint in place of the input line and any previous hint
+            hint = '*** Invalid choice ' + repr(p_input) + ', enter 0 to ' + str(len(play.legal_actions) - 1) + '\n'
+            show(clear_lines(num_lines + 1) + frame + hint)
+            num_lines = frame.count('\n') + 1
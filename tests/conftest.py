@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+### Make the tichu and src packages importable when pytest is run from anywhere
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+### Stands in for tqdm.notebook, which needs a Jupyter frontend
+class ProgressBar:
+    def __init__(self, iterable=None, total=None, **kwargs):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def tournament_module(monkeypatch):
+    import src.Tournament
+    monkeypatch.setattr(src.Tournament, 'tqdm', ProgressBar)
+    return src.Tournament
+
+
+### Tests marked slow (exhaustive sweeps, long benchmarks) only run with --runslow
+def pytest_addoption(parser):
+    parser.addoption('--runslow', action='store_true', default=False, help='run the tests marked slow')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: long running test, only run with --runslow')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--runslow'):
+        return
+
+    skip_slow = pytest.mark.skip(reason='needs --runslow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
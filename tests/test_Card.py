@@ -0,0 +1,170 @@
+import itertools
+
+import pytest
+
+from tichu.Card import classify_mask
+
+NIBBLES = [0, 1, 3, 7, 15]
+SUIT_NAMES = ['Spade', 'Heart', 'Dia', 'Club']
+
+
+### Card of the baseline: ordered by value only, so sort keeps the suit order of equal values
+class BaselineCard:
+
+    def __init__(self, value, suit):
+        self.value = value
+        self.suit = suit
+
+    def __lt__(self, other):
+        return self.value < other.value
+
+
+### Cards.set_combination of the baseline, copied verbatim: the card-by-card rules classify_mask replaced
+class BaselineCards:
+
+    def __init__(self, card_list):
+        self.cards = card_list
+        self.value = None
+        self.type = None
+
+    def set_combination(self):
+        card_set = self.cards
+        card_set.sort()
+
+        ### pass
+        if len(card_set) == 0:
+            self.type = 'pass'
+            self.value = 0
+            return
+
+        ### solo
+        if len(card_set) == 1:
+            self.type = 'solo'
+            self.value = card_set[0].value
+            return
+
+        ### pair
+        if len(card_set) == 2 and card_set[0].value == card_set[1].value:
+            self.type = 'pair'
+            self.value = card_set[0].value
+            return
+
+        ### triple
+        if len(card_set) == 3 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value:
+            self.type = 'triple'
+            self.value = card_set[0].value
+            return
+
+        ### four
+        if len(card_set) == 4 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value and \
+                card_set[2].value == card_set[3].value:
+            self.type = 'four'
+            self.value = card_set[0].value
+            return
+
+        ### full
+        if len(card_set) == 5 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value and \
+                card_set[3].value == card_set[4].value:
+            self.type = 'full'
+            self.value = card_set[0].value
+            return
+        if len(card_set) == 5 and card_set[0].value == card_set[1].value and card_set[2].value == card_set[3].value and \
+                card_set[3].value == card_set[4].value:
+            self.type = 'full'
+            self.value = card_set[2].value
+            return
+
+        ### strat and strat_flush
+        if len(card_set) >= 5:
+            strat = True
+            flush = True
+            for i in range(len(card_set) - 1):
+                if card_set[i].value + 1 == card_set[i + 1].value:
+                    if card_set[i].suit == card_set[i + 1].suit:
+                        pass
+                    else:
+                        flush = False
+                else:
+                    strat = False
+                    break
+            if strat == True and flush == True:
+                self.type = 'strat_flush'
+                self.value = 100 * len(card_set) + card_set[0].value
+                return
+            elif strat == True and flush == False:
+                self.type = 'strat'
+                self.value = 100 * len(card_set) + card_set[0].value
+                return
+            else:
+                pass
+
+        ### pair_seq
+        if len(card_set) >= 4 and len(card_set) % 2 == 0:
+            pair_seq = True
+            for i in range(len(card_set) - 1):
+                if i % 2 == 0 and card_set[i].value == card_set[i + 1].value:
+                    pass
+                elif i % 2 == 1 and card_set[i].value + 1 == card_set[i + 1].value:
+                    pass
+                else:
+                    pair_seq = False
+                    break
+            if pair_seq == True:
+                self.type = 'pair_seq'
+                self.value = 100 * len(card_set) + card_set[0].value
+                return
+
+        ### none
+        self.type = 'none'
+        return
+
+
+BASELINE_CARDS = [BaselineCard(i // 4 + 2, SUIT_NAMES[i % 4]) for i in range(52)]
+
+
+def classify_cards(card_list):
+    cards = BaselineCards(card_list)
+    cards.set_combination()
+    return cards.type, cards.value
+
+
+def classify_reference(mask):
+    card_list = []
+    while mask:
+        low = mask & -mask
+        card_list.append(BASELINE_CARDS[low.bit_length() - 1])
+        mask ^= low
+    return classify_cards(card_list)
+
+
+def test_classify_mask_exhaustive_up_to_five_cards():
+    for size in range(6):
+        for indices in itertools.combinations(range(52), size):
+            mask = 0
+            for i in indices:
+                mask |= 1 << i
+            assert classify_mask(mask) == classify_cards([BASELINE_CARDS[i] for i in indices]), indices
+
+
+### Every rank histogram of 6 to 13 cards, on the lowest suits of each value. When no value holds more than one
+### card, the highest card is also moved to the next suit, which turns straight flushes into straights.
+@pytest.mark.slow
+def test_classify_mask_rank_histograms():
+    checked = 0
+    stack = [(0, 0, 0, True)]
+    while stack:
+        rank, size, mask, single = stack.pop()
+        if rank == 13:
+            if size >= 6:
+                assert classify_mask(mask) == classify_reference(mask), mask
+                checked += 1
+                if single:
+                    top = mask.bit_length() - 1
+                    moved = mask ^ (1 << top) ^ (1 << (top + 1))
+                    assert classify_mask(moved) == classify_reference(moved), moved
+            continue
+
+        for count in range(min(4, 13 - size) + 1):
+            stack.append((rank + 1, size + count, mask | NIBBLES[count] << (4 * rank), single and count < 2))
+
+    assert checked > 0
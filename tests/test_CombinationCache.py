@@ -0,0 +1,66 @@
+from tichu.Card import Cards, combination_cache
+from tichu.CombinationCache import CombinationCache
+
+
+def test_lru_eviction_order():
+    cache = CombinationCache(maxsize=3)
+    for key in (1, 2, 3):
+        cache.put(key, str(key))
+
+    ### A get makes 1 the most recently used, so 2 is evicted first
+    assert cache.get(1) == '1'
+    cache.put(4, '4')
+    assert list(cache.entries) == [3, 1, 4]
+    assert cache.get(2) is None
+
+    ### peek neither counts nor reorders
+    assert cache.peek(3) == '3'
+    cache.put(5, '5')
+    assert list(cache.entries) == [1, 4, 5]
+    assert cache.info() == {'hits': 1, 'misses': 1, 'size': 3, 'maxsize': 3, 'enabled': True}
+
+
+def test_resize_evicts_least_recently_used():
+    cache = CombinationCache(maxsize=4)
+    for key in range(4):
+        cache.put(key, key)
+    cache.get(0)
+
+    cache.resize(2)
+    assert list(cache.entries) == [3, 0]
+
+    cache.resize(0)
+    assert not cache.enabled and len(cache.entries) == 0
+    cache.enable()
+    assert not cache.enabled
+
+
+def test_disabled_cache_passes_through():
+    cache = CombinationCache(maxsize=4)
+    cache.put(1, 'a')
+    cache.disable()
+
+    cache.put(2, 'b')
+    assert cache.get(1) is None and cache.peek(1) is None
+    assert list(cache.entries) == [1]
+    assert cache.hits == 0 and cache.misses == 0
+
+    cache.enable()
+    assert cache.get(1) == 'a'
+    cache.clear()
+    assert cache.info() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 4, 'enabled': True}
+
+
+### With the shared cache disabled, hands still enumerate the same combinations
+def test_disabled_shared_cache_gives_same_combinations():
+    mask = 0b1111_0011_0101_1000_0001_1111
+    cached = Cards.from_mask(mask).get_available_combination()
+    combination_cache.disable()
+    try:
+        uncached = Cards.from_mask(mask).get_available_combination()
+    finally:
+        combination_cache.enable()
+
+    assert uncached is not cached
+    assert [[c.mask for c in same_type] for same_type in uncached] == \
+           [[c.mask for c in same_type] for same_type in cached]
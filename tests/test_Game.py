@@ -0,0 +1,77 @@
+import random
+
+from tichu.Card import Cards
+from tichu.TichuEnv import TichuEnv
+
+
+def new_env():
+    env = TichuEnv()
+    env.set_team_names(['Team 0', 'Team 1'])
+    return env
+
+
+def get_result(env):
+    return env.game.get_points(), [list(p.accumulated_points) for p in env.game.players], env.rounds_to_win
+
+
+### Play random actions to the end of the game, logging them as (mask, type, value)
+def play_to_end(env, state, rng, actions):
+    while not env.is_over():
+        action = rng.choice(state.legal_actions)
+        actions.append((action.mask, action.type, action.value))
+        state, player_id = env.next_turn(action)
+    return get_result(env)
+
+
+def replay(env, actions):
+    for mask, ctype, value in actions:
+        env.next_turn(Cards.from_mask(mask, value=value, ctype=ctype))
+    return get_result(env)
+
+
+### A game restored from a snapshot, in the same env or in a fresh one, replays the same actions to the same points
+def test_restored_game_replays_to_same_points():
+    replayed = 0
+    for seed in range(200):
+        rng = random.Random(seed)
+        env = new_env()
+        state, player_id = env.reset(seed)
+        for _ in range(rng.randint(0, 40)):
+            if env.is_over():
+                break
+            state, player_id = env.next_turn(rng.choice(state.legal_actions))
+        if env.is_over():
+            continue
+
+        snapshot = env.game.snapshot()
+        actions = []
+        result = play_to_end(env, state, rng, actions)
+
+        env.game.restore(snapshot)
+        assert replay(env, actions) == result
+
+        fresh_env = new_env()
+        fresh_env.game.restore(snapshot)
+        assert fresh_env.game.action_log == list(snapshot.action_log)
+        assert replay(fresh_env, actions) == result
+        assert fresh_env.game.action_log == env.game.action_log
+        replayed += 1
+
+    assert replayed > 100
+
+
+### Restoring the same snapshot again gives the same legal actions, so a search can branch from it repeatedly
+def test_restore_is_repeatable():
+    rng = random.Random(1)
+    env = new_env()
+    state, player_id = env.reset(1)
+    for _ in range(10):
+        state, player_id = env.next_turn(rng.choice(state.legal_actions))
+
+    snapshot = env.game.snapshot()
+    legal_masks = [action.mask for action in state.legal_actions]
+    for _ in range(3):
+        play_to_end(env, state, rng, [])
+        env.game.restore(snapshot)
+        state = env.game.get_active_player(env.game.round.current_player)
+        assert [action.mask for action in state.legal_actions] == legal_masks
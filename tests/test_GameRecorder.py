@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from tichu.GameRecorder import GameRecorder, MAX_AGENT_NAME, RECORD_DTYPE, load_game_records, open_game_records
+from tichu.TichuEnv import TichuEnv
+from src.agents.Conservative import Conservative
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+
+
+### Games recorded across several shards and flushes read back as written, in order
+def test_record_round_trip(tmp_path):
+    directory = str(tmp_path)
+    random.seed(0)
+    recorder = GameRecorder(directory, shard_size=4, buffer_size=3)
+    env = TichuEnv(seed=1, recorder=recorder)
+    agents = [Random(), Conservative(), Max(), Risk()]
+    env.set_agents(agents)
+    env.set_team_names(['Team 0', 'Team 1'])
+
+    expected = []
+    for _ in range(10):
+        game_points, accumulated_points, rounds_to_win, _ = env.run()
+        expected.append((env.game.deal_masks, [list(p) for p in accumulated_points],
+                         env.game.round.get_out_players(), rounds_to_win, game_points))
+    recorder.close()
+
+    shards = open_game_records(directory)
+    assert [len(shard) for shard in shards] == [4, 4, 2]
+    records = load_game_records(directory)
+    assert len(records) == 10
+    for record, (deal_masks, accumulated_points, finish_order, rounds_to_win, game_points) in zip(records, expected):
+        assert tuple(int(mask) for mask in record['deal']) == deal_masks
+        assert list(record['agents']) == [agent.strategy for agent in agents]
+        assert [list(record['accumulated_points'][seat, :record['num_points'][seat]])
+                for seat in range(4)] == accumulated_points
+        assert list(record['finish_order'][record['finish_order'] >= 0]) == finish_order
+        assert record['rounds_to_win'] == rounds_to_win
+        assert list(record['points']) == game_points
+
+    ### A new recorder continues after the existing shards
+    with GameRecorder(directory, shard_size=4) as recorder:
+        recorder.write(expected[0][0], ['Random'] * 4, [[0]] * 4, [0, 1, 2], 1, [300, 200, 100, 0])
+    assert len(open_game_records(directory)) == 4
+    assert len(load_game_records(directory)) == 11
+
+
+def test_agent_name_too_long(tmp_path):
+    recorder = GameRecorder(str(tmp_path))
+    with pytest.raises(ValueError):
+        recorder.write((0, 0, 0, 0), ['x' * (MAX_AGENT_NAME + 1)] + ['Random'] * 3, [[]] * 4, [], 0, [0] * 4)
+    recorder.write((0, 0, 0, 0), ['x' * MAX_AGENT_NAME] * 4, [[]] * 4, [], 0, [0] * 4)
+    recorder.close()
+    assert list(load_game_records(str(tmp_path))['agents'][0]) == ['x' * MAX_AGENT_NAME] * 4
+
+
+def test_empty_directory(tmp_path):
+    records = load_game_records(str(tmp_path))
+    assert len(records) == 0 and records.dtype == RECORD_DTYPE
@@ -0,0 +1,49 @@
+import gc
+import os
+import random
+
+import pytest
+
+from tichu.Card import combination_cache
+from tichu.GameState import GameState
+from tichu.TichuEnv import TichuEnv
+
+
+def play_games(env, rng, num_games):
+    for _ in range(num_games):
+        state, player_id = env.reset()
+        while not env.is_over():
+            state, player_id = env.next_turn(rng.choice(state.legal_actions))
+
+
+def get_rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def test_states_do_not_share_card_num():
+    env = TichuEnv(seed=0)
+    env.set_team_names(['Team 0', 'Team 1'])
+    play_games(env, random.Random(0), 3)
+
+    states = [env.get_state(i) for i in range(env.player_num)]
+    assert not isinstance(getattr(GameState, 'card_num', None), list)
+    assert all(len(state.card_num) == env.player_num for state in states)
+
+
+### Memory regression: once the combination cache is full, thousands of further games must not grow the RSS
+@pytest.mark.slow
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='needs /proc to read the RSS')
+def test_rss_stays_flat_over_thousands_of_games():
+    env = TichuEnv(seed=0)
+    env.set_team_names(['Team 0', 'Team 1'])
+    rng = random.Random(0)
+
+    play_games(env, rng, 2000)
+    assert len(combination_cache.entries) == combination_cache.maxsize
+    gc.collect()
+    before = get_rss_kb()
+
+    play_games(env, rng, 3000)
+    gc.collect()
+    assert get_rss_kb() - before < 2048
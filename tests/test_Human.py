@@ -0,0 +1,26 @@
+from src.agents.Human import Human
+from tichu.Renderer import clear_lines, render_state
+from tichu.TichuEnv import TichuEnv
+
+
+def get_state():
+    env = TichuEnv(seed=0)
+    env.set_team_names(['Team 0', 'Team 1'])
+    state, player_id = env.reset()
+    return state
+
+
+### An invalid entry redraws the frame with a hint instead of clearing it, and a valid one then clears it all
+def test_invalid_choice_keeps_the_frame(monkeypatch, capsys):
+    state = get_state()
+    frame = render_state(state)
+    num_lines = frame.count('\n')
+    entries = iter(['x', str(len(state.legal_actions)), '-1', '1'])
+    monkeypatch.setattr('builtins.input', lambda prompt: next(entries))
+
+    assert Human().play(state) is state.legal_actions[1]
+
+    output = capsys.readouterr().out
+    assert output.startswith(frame + clear_lines(num_lines + 1) + frame + "*** Invalid choice 'x'")
+    assert output.count(frame) == 4
+    assert output.endswith(clear_lines(num_lines + 2))
@@ -0,0 +1,28 @@
+import random
+
+from tichu.TichuEnv import TichuEnv
+
+
+def combination_signature(combinations):
+    return [[(c.type, c.value, c.mask) for c in same_type] for same_type in combinations]
+
+
+### Differential test: the incrementally maintained combination index of every player must match a full
+### recomputation from the hand after every move of seeded random games
+def test_incremental_combinations_match_recomputation():
+    rng = random.Random(0)
+    env = TichuEnv()
+    env.set_team_names(['Team 0', 'Team 1'])
+
+    comparisons = 0
+    for seed in range(100):
+        state, player_id = env.reset(seed)
+        while not env.is_over():
+            for player in env.game.players:
+                assert combination_signature(player.get_available_combination()) == \
+                       combination_signature(player.hand.enumerate_combination())
+                comparisons += 1
+
+            state, player_id = env.next_turn(rng.choice(state.legal_actions))
+
+    assert comparisons > 10000
@@ -0,0 +1,72 @@
+import random
+
+from tichu.Card import Cards, FULL_DECK_MASK
+from tichu.Replay import GameLogWriter, read_game_logs, replay_game
+from tichu.TichuEnv import TichuEnv
+from src.agents.Conservative import Conservative
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+
+
+### Game.get_points appends to the accumulated points, so it is called once, as in TichuEnv.run
+def get_final_state(env):
+    return ([list(p.accumulated_points) for p in env.game.players],
+            [p.won_card.mask for p in env.game.players], [p.hand.mask for p in env.game.players],
+            env.game.round.finish_order, env.rounds_to_win)
+
+
+def test_same_seed_same_deal():
+    deals = []
+    for seed in (5, 5, 6):
+        env = TichuEnv(seed=seed)
+        env.set_team_names(['Team 0', 'Team 1'])
+        env.reset()
+        deals.append(env.game.deal_masks)
+
+    assert deals[0] == deals[1] != deals[2]
+    for deal in deals:
+        assert sum(Cards.from_mask(mask).size for mask in deal) == 52
+        assert deal[0] | deal[1] | deal[2] | deal[3] == FULL_DECK_MASK
+
+    ### Reseeding an env deals the same game again
+    env = TichuEnv()
+    env.set_team_names(['Team 0', 'Team 1'])
+    env.reset(5)
+    assert env.game.deal_masks == deals[0]
+
+
+### Seeded games written to a log replay to the same final state and points
+def test_log_round_trip(tmp_path):
+    path = str(tmp_path / 'games.log')
+    random.seed(0)
+    env = TichuEnv(seed=1, log_writer=GameLogWriter(path, buffer_size=4))
+    env.set_agents([Random(), Conservative(), Max(), Risk()])
+    env.set_team_names(['Team 0', 'Team 1'])
+
+    points = []
+    final_states = []
+    action_logs = []
+    for _ in range(10):
+        points.append(env.run()[0])
+        final_states.append(get_final_state(env))
+        action_logs.append(list(env.game.action_log))
+    env.log_writer.close()
+
+    logs = list(read_game_logs(path))
+    assert len(logs) == 10
+    for (deal_masks, action_log), game_points, final_state, expected_log in zip(logs, points, final_states,
+                                                                                action_logs):
+        assert list(action_log) == expected_log
+        assert replay_game(deal_masks, action_log) == game_points
+
+        replay_env = TichuEnv(deal=deal_masks)
+        replay_env.set_team_names(['Team 0', 'Team 1'])
+        replay_env.reset()
+        for mask in action_log:
+            action = Cards.from_mask(mask)
+            action.set_combination()
+            replay_env.next_turn(action)
+        assert replay_env.is_over()
+        assert replay_env.game.get_points() == game_points
+        assert get_final_state(replay_env) == final_state
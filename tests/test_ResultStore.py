@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.ResultStore import ResultStore
+from src.agents.Conservative import Conservative
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+
+
+def get_agents():
+    return [Random(), Max(), Risk(), Conservative()]
+
+
+### The store's counts must agree with the statistics the tournament keeps itself
+def assert_store_matches_teams(store, tournament):
+    games_played = store.get_games_played()
+    win_probabilities = store.get_win_probabilities()
+    for pairing in tournament.pairings:
+        for team, other_team in (pairing.teams, pairing.teams[::-1]):
+            i, j = store.team_index[str(team)], store.team_index[str(other_team)]
+            assert games_played[i, j] == team.get_games_played_against(str(other_team))
+            assert np.isclose(win_probabilities[i, j], team.get_win_probability(str(other_team)))
+
+
+def test_from_tournament(tournament_module):
+    tournament = tournament_module.Tournament(get_agents(), matches_per_pairing=12)
+    tournament.play(seed=0, chunk_size=5)
+
+    store = ResultStore.from_tournament(tournament)
+    assert len(store.matches) == 45 * 12
+    assert_store_matches_teams(store, tournament)
+
+
+def test_adaptive_tournament(tournament_module, tmp_path):
+    tournament = tournament_module.Tournament(get_agents(), matches_per_pairing=30)
+    tournament.play(seed=0, chunk_size=5, stop_confidence=.9)
+    with pytest.raises(ValueError, match="from_results_log"):
+        ResultStore.from_tournament(tournament)
+
+    logged = tournament_module.Tournament(get_agents(), matches_per_pairing=30)
+    logged.play(seed=0, chunk_size=5, stop_confidence=.9, log_path=str(tmp_path))
+    store = ResultStore.from_results_log(str(tmp_path))
+    assert len(store.matches) == sum(pairing.get_count_of_matches_played() for pairing in logged.pairings)
+    assert_store_matches_teams(store, logged)
+
+
+def test_rated_tournament_is_rejected(tournament_module):
+    tournament = tournament_module.Tournament(get_agents(), matches_per_pairing=10)
+    tournament.play_rated(40, seed=0, chunk_size=5)
+    with pytest.raises(ValueError, match="rated tournament"):
+        ResultStore.from_tournament(tournament)
+
+
+### Duplicate play gives two games per deal, both must be in the store
+def test_duplicate_tournament(tournament_module, tmp_path):
+    tournament = tournament_module.Tournament(get_agents(), matches_per_pairing=10)
+    tournament.play(seed=0, chunk_size=5, duplicate=True)
+
+    store = ResultStore.from_tournament(tournament)
+    assert store.header['duplicate']
+    assert len(store.matches) == 45 * 20
+    assert_store_matches_teams(store, tournament)
+
+    store.save(str(tmp_path / 'duplicate.results'))
+    loaded = ResultStore.load(str(tmp_path / 'duplicate.results'))
+    assert loaded.header['duplicate'] and np.array_equal(loaded.matches, store.matches)
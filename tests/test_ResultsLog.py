@@ -0,0 +1,81 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src.ResultStore import ResultStore
+from src.ResultsLog import CHECKPOINT_FILE, RESULT_RECORD, RESULTS_FILE, ResultsLog, read_checkpoint, \
+    read_results, write_checkpoint
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+
+
+def test_results_round_trip(tmp_path):
+    path = str(tmp_path)
+    with ResultsLog(path, buffer_size=3) as results_log:
+        for match_index in range(4):
+            results_log.append(1, match_index, (match_index, 0, -match_index, 0), match_index + 1, match_index % 2)
+        results_log.append(0, 0, (300, 0, 200, 100), 5, 1)
+
+    assert read_checkpoint(path) == {0: 1, 1: 4}
+    assert read_results(path) == {0: [((300, 0, 200, 100), 5, 1)],
+                                  1: [((i, 0, -i, 0), i + 1, i % 2) for i in range(4)]}
+
+
+### Results past the checkpoint are ignored, and a torn record at the end is dropped before appending
+def test_checkpoint_and_torn_record(tmp_path):
+    path = str(tmp_path)
+    with ResultsLog(path) as results_log:
+        for match_index in range(3):
+            results_log.append(0, match_index, (match_index, 0, 0, 0), 1, 0)
+    write_checkpoint(path, {0: 2})
+    with open(os.path.join(path, RESULTS_FILE), 'ab') as f:
+        f.write(RESULT_RECORD.pack(0, 3, 3, 0, 0, 0, 1, 0)[:5])
+
+    assert read_results(path) == {0: [((i, 0, 0, 0), 1, 0) for i in range(2)]}
+    with ResultsLog(path) as results_log:
+        results_log.append(0, 2, (7, 0, 0, 0), 1, 0)
+    assert os.path.getsize(os.path.join(path, RESULTS_FILE)) == 4 * RESULT_RECORD.size
+    assert read_results(path)[0][2] == ((7, 0, 0, 0), 1, 0)
+
+    write_checkpoint(path, {0: 5})
+    with pytest.raises(ValueError):
+        read_results(path)
+
+
+def get_team_results(tournament):
+    return [(team.get_team_id(), team.scores, team.rounds_for_win) for team in tournament.teams]
+
+
+### A run interrupted at any point and resumed gives the statistics, in the same order, and the log of an
+### uninterrupted run
+@pytest.mark.parametrize('stop_confidence', [None, .9])
+def test_resume_matches_uninterrupted_run(tournament_module, tmp_path, stop_confidence):
+    full_path, resumed_path = str(tmp_path / 'full'), str(tmp_path / 'resumed')
+    tournament = tournament_module.Tournament([Random(), Max(), Risk()], matches_per_pairing=10)
+    tournament.play(seed=3, chunk_size=3, log_path=full_path, stop_confidence=stop_confidence)
+    assert len(tournament.pairings) > 3
+
+    # Interrupt: the second pairing stopped inside a unit while the first and third are complete, the others
+    # never started, and the last record was torn while it was written
+    shutil.copytree(full_path, resumed_path)
+    checkpoint = read_checkpoint(full_path)
+    write_checkpoint(resumed_path, {0: checkpoint[0], 1: min(checkpoint[1], 4), 2: checkpoint[2]})
+    results_path = os.path.join(resumed_path, RESULTS_FILE)
+    with open(results_path, 'r+b') as f:
+        f.truncate(os.path.getsize(results_path) - 3)
+
+    resumed = tournament_module.Tournament.resume(resumed_path)
+    assert get_team_results(resumed) == get_team_results(tournament)
+    assert [pairing.get_count_of_matches_played() for pairing in resumed.pairings] == \
+        [pairing.get_count_of_matches_played() for pairing in tournament.pairings]
+    assert read_results(resumed_path) == read_results(full_path)
+
+    if stop_confidence is None:
+        stores = [ResultStore.from_tournament(resumed), ResultStore.from_tournament(tournament)]
+    else:
+        stores = [ResultStore.from_results_log(resumed_path), ResultStore.from_results_log(full_path)]
+    assert stores[0].header == stores[1].header
+    assert np.array_equal(stores[0].matches, stores[1].matches)
@@ -0,0 +1,19 @@
+import pytest
+
+from src.Stats import get_confidence_interval_paired_difference
+
+
+def test_confidence_interval_paired_difference():
+    ### Differences 1, 0, -1, 1: mean 0.25, sample variance 2.75 / 3
+    lower, upper = get_confidence_interval_paired_difference(.25, 2.75 / 3, 4)
+    assert (lower, upper) == pytest.approx((-.68826, 1.18826))
+    assert upper - lower == pytest.approx(2 * 1.959964 * (2.75 / 3 / 4) ** .5, abs=1e-4)
+
+    narrower = get_confidence_interval_paired_difference(.25, 2.75 / 3, 4, confidence_level=.9)
+    assert lower < narrower[0] < .25 < narrower[1] < upper
+
+
+### Without variance (every pair alike, or a single pair) the interval is the mean itself
+def test_confidence_interval_paired_difference_without_variance():
+    assert get_confidence_interval_paired_difference(.5, 0, 1) == (.5, .5)
+    assert get_confidence_interval_paired_difference(-1, 0, 3) == (-1, -1)
@@ -0,0 +1,106 @@
+import pytest
+
+from src.Pairing import Pairing
+from src.ResultsLog import ResultsLog, read_results
+from src.Team import Team
+from src.Tournament import Tournament
+from src.agents.Conservative import Conservative
+from src.agents.Random import Random
+
+
+def get_pairing():
+    return Pairing([Team([Conservative(), Conservative()], 100), Team([Random(), Random()], 100)])
+
+
+### A pairing stopped after 5 games, all started by team a: team a never played second and team b never first
+def test_one_sided_first_player_games_are_counted():
+    pairing = get_pairing()
+    team_a, team_b = pairing.teams
+    for points in ([100, 0, 100, 0], [0, 50, 0, 50], [100, 0, 100, 0], [100, 0, 100, 0], [60, 40, 40, 60]):
+        Tournament.update_pairing_stats(pairing, points, 1, {str(team_a): 1, str(team_b): 0})
+
+    assert str(team_b) not in team_a.second_to_play and str(team_a) not in team_b.first_to_play
+    assert team_a.get_total_games_played_first_second(str(team_b)) == (5, 0)
+    assert team_b.get_total_games_played_first_second(str(team_a)) == (0, 5)
+    assert team_a.get_games_played_against(str(team_b)) == team_b.get_games_played_against(str(team_a)) == 5
+
+    assert team_a.get_win_probability(str(team_b)) == .6
+    assert team_b.get_win_probability(str(team_a)) == .2
+    assert team_a.get_draw_probability(str(team_b)) == team_b.get_draw_probability(str(team_a)) == .2
+    assert team_a.get_overall_win_probability() == .6
+    lower, upper = team_a.get_win_confidence_interval(str(team_b))
+    assert lower < .6 < upper
+
+    assert team_a.get_win_probability_first_second(str(team_b)) == (.6, 0)
+    assert team_b.get_win_probability_first_second(str(team_a)) == (0, .2)
+    assert team_b.get_draw_probability_first_second(str(team_a)) == (0, .2)
+    assert team_b.get_win_confidence_interval_first_second(str(team_a))[0] == (0, 0)
+    assert team_a.get_win_confidence_interval_first_second(str(team_b))[1] == (0, 0)
+
+
+def test_no_games_played():
+    team_a, team_b = get_pairing().teams
+    assert team_a.get_games_played_against(str(team_b)) == 0
+    assert team_a.get_win_probability(str(team_b)) == 0
+    assert team_a.get_win_confidence_interval(str(team_b)) == (0, 0)
+    assert team_a.get_overall_win_probability() == 0
+
+
+def test_paired_results():
+    team_a, team_b = get_pairing().teams
+    assert team_a.get_paired_difference(str(team_b)) == (0, 0, 0)
+    assert team_a.get_paired_win_probability(str(team_b)) == 0
+    assert team_a.get_paired_win_confidence_interval(str(team_b)) == (0, 0)
+
+    ### A single deal has no sample variance: the interval is the point estimate
+    team_a.add_paired_result(1, team_b)
+    team_b.add_paired_result(-1, team_a)
+    assert team_a.get_paired_difference(str(team_b)) == (1, 1, 0)
+    assert team_a.get_paired_win_probability(str(team_b)) == 1
+    assert team_a.get_paired_win_confidence_interval(str(team_b)) == (1, 1)
+    assert team_b.get_paired_win_confidence_interval(str(team_a)) == (0, 0)
+
+    ### Differences 1, 0, -1, 1: mean 0.25, sample variance 2.75 / 3
+    for difference in (0, -1, 1):
+        team_a.add_paired_result(difference, team_b)
+        team_b.add_paired_result(-difference, team_a)
+    assert team_a.paired_results[str(team_b)] == [4, 1., 3.]
+    n, mean, variance = team_a.get_paired_difference(str(team_b))
+    assert (n, mean) == (4, .25) and variance == pytest.approx(2.75 / 3)
+    assert team_a.get_paired_win_probability(str(team_b)) == .625
+    assert team_a.get_paired_win_confidence_interval(str(team_b)) == pytest.approx(((1 - .68826) / 2,
+                                                                                   (1 + 1.18826) / 2), abs=1e-5)
+    lower, upper = team_b.get_paired_win_confidence_interval(str(team_a))
+    assert (lower, upper) == pytest.approx((1 - (1 + 1.18826) / 2, 1 - (1 - .68826) / 2), abs=1e-5)
+
+
+### Deals that all end alike have no variance either
+def test_paired_results_without_variance():
+    team_a, team_b = get_pairing().teams
+    for _ in range(5):
+        team_a.add_paired_result(.5, team_b)
+    assert team_a.get_paired_difference(str(team_b)) == (5, .5, 0)
+    assert team_a.get_paired_win_confidence_interval(str(team_b)) == (.75, .75)
+
+
+### Duplicate results are logged one record per game, so the two games of a deal never share an index
+def test_duplicate_results_log_game_indices(tournament_module, tmp_path):
+    tournament = tournament_module.Tournament([Conservative(), Random()], matches_per_pairing=5)
+    tournament.duplicate = True
+    units = tournament.get_work_units(0, 2)
+    with ResultsLog(str(tmp_path)) as results_log:
+        tournament.play_units(units, results_log=results_log)
+
+    results = read_results(str(tmp_path))
+    assert sorted(results) == list(range(len(tournament.pairings)))
+    for pairing_index, pairing in enumerate(tournament.pairings):
+        assert len(results[pairing_index]) == 2 * 5
+        team_a, team_b = pairing.teams
+        assert team_a.paired_results[str(team_b)][0] == 5
+
+    ### Folding the log back instead of playing gives the same statistics
+    logged = tournament_module.Tournament([Conservative(), Random()], matches_per_pairing=5)
+    logged.duplicate = True
+    logged.play_units(logged.get_work_units(0, 2), logged_results=results)
+    assert [(team.scores, team.paired_results) for team in logged.teams] == \
+        [(team.scores, team.paired_results) for team in tournament.teams]
@@ -0,0 +1,93 @@
+import os
+import random
+
+from src.ResultsLog import RESULTS_FILE, read_results
+from src.Tournament import get_deal_and_agent_seeds, play_matches
+from src.agents.Conservative import Conservative
+from src.agents.Max import Max
+from src.agents.Random import Random
+from src.agents.Risk import Risk
+
+
+def test_deal_and_agent_seeds_are_independent():
+    for unit_seed in range(100):
+        deal_seed, agent_seed = get_deal_and_agent_seeds(unit_seed)
+        assert deal_seed != agent_seed
+        assert random.Random(deal_seed).random() != random.Random(agent_seed).random()
+        assert get_deal_and_agent_seeds(unit_seed) == (deal_seed, agent_seed)
+
+
+def test_play_matches_is_reproducible_and_restores_random():
+    agents = [Random(), Random(), Random(), Random()]
+    random.seed(3)
+    state = random.getstate()
+
+    results = play_matches(agents, ['Team 0', 'Team 1'], 5, 1234)
+    assert random.getstate() == state
+    assert play_matches(agents, ['Team 0', 'Team 1'], 5, 1234) == results
+    assert play_matches(agents, ['Team 0', 'Team 1'], 5, 1235) != results
+
+
+### Adaptive stopping leaves pairings where one team only played first: every statistic must still be defined
+def test_adaptive_tournament_statistics(tournament_module):
+    tournament = tournament_module.Tournament([Random(), Max(), Risk(), Conservative()], matches_per_pairing=100)
+    tournament.play(seed=0, chunk_size=5, stop_confidence=.9)
+
+    assert any(pairing.get_count_of_matches_played() < 100 for pairing in tournament.pairings)
+    for pairing in tournament.pairings:
+        for team, other_team in (pairing.teams, pairing.teams[::-1]):
+            n = team.get_games_played_against(str(other_team))
+            assert n == pairing.get_count_of_matches_played()
+            assert 0 <= team.get_win_probability(str(other_team)) <= 1
+            team.get_win_confidence_interval(str(other_team))
+            team.get_draw_confidence_interval(str(other_team))
+            team.get_win_confidence_interval_first_second(str(other_team))
+            team.get_draw_confidence_interval_first_second(str(other_team))
+    for team in tournament.teams:
+        assert 0 <= team.get_overall_win_probability() <= 1
+
+
+### Every rated match updates the pairing statistics and the ratings once
+def test_play_rated(tournament_module):
+    tournament = tournament_module.Tournament([Random(), Max(), Risk(), Conservative()], matches_per_pairing=10)
+    ratings = tournament.play_rated(60, seed=0, chunk_size=5, pairings_per_round=3)
+
+    assert ratings.games_played == 60
+    assert sum(pairing.get_count_of_matches_played() for pairing in tournament.pairings) == 60
+
+    again = tournament_module.Tournament([Random(), Max(), Risk(), Conservative()], matches_per_pairing=10)
+    assert again.play_rated(60, seed=0, chunk_size=5, pairings_per_round=3).ratings == ratings.ratings
+
+
+def get_team_results(tournament):
+    return [(team.get_team_id(), team.scores, team.rounds_for_win, team.paired_results) for team in tournament.teams]
+
+
+### Seeded results only depend on the seed and chunk_size: worker processes give the same statistics and log
+def test_play_in_workers_matches_play_in_process(tournament_module, tmp_path):
+    logs = []
+    team_results = []
+    for num_workers in (None, 2):
+        tournament = tournament_module.Tournament([Random(), Max(), Risk()], matches_per_pairing=10)
+        log_path = str(tmp_path / str(num_workers))
+        tournament.play(seed=7, num_workers=num_workers, chunk_size=3, log_path=log_path)
+        team_results.append(get_team_results(tournament))
+        with open(os.path.join(log_path, RESULTS_FILE), 'rb') as f:
+            logs.append(f.read())
+        assert sum(len(pairing_results) for pairing_results in read_results(log_path).values()) == \
+            10 * len(tournament.pairings)
+
+    assert team_results[0] == team_results[1]
+    assert logs[0] == logs[1]
+
+
+def test_duplicate_play_in_workers_matches_play_in_process(tournament_module):
+    team_results = []
+    for num_workers in (None, 2):
+        tournament = tournament_module.Tournament([Random(), Max(), Risk()], matches_per_pairing=6)
+        tournament.play(seed=7, num_workers=num_workers, chunk_size=4, duplicate=True)
+        team_results.append(get_team_results(tournament))
+        assert all(len(team.scores) == 2 * 6 * (len(tournament.teams) - 1) for team in tournament.teams)
+
+    assert team_results[0] == team_results[1]
+    assert all(team.paired_results for team in tournament.teams)
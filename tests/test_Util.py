@@ -0,0 +1,190 @@
+import random
+
+import numpy as np
+
+from tichu.Card import Cards, COMBINATION_TYPES
+from tichu.TichuEnv import TichuEnv
+from tichu.Util import encode_states, get_legal_combination, state_parse, Ground, ONE_HOT_STATE_SIZE, STATE_SIZE
+
+
+### The encoder encode_states replaced, with state['played_cards'] read as state.played_cards
+def state_parse_reference(state):
+    hand = state.hand
+    hand_state = np.zeros(26)
+    for i in range(hand.size):
+        hand_state[2 * i] = hand.cards[i].value
+        if hand.cards[i].suit == 'Spade':
+            hand_state[2 * i + 1] = 1
+        elif hand.cards[i].suit == 'Heart':
+            hand_state[2 * i + 1] = 2
+        elif hand.cards[i].suit == 'Dia':
+            hand_state[2 * i + 1] = 3
+        elif hand.cards[i].suit == 'Club':
+            hand_state[2 * i + 1] = 4
+        else:
+            raise ValueError
+
+    ground_state = np.zeros(3)
+    ground_state[0] = ['none', 'solo', 'pair', 'triple', 'four', 'full', 'strat', 'strat_flush',
+                       'pair_seq'].index(state.ground.type)
+    ground_state[1] = state.ground.value
+    ground_state[2] = state.ground.player_id
+
+    card_state = np.zeros(3)
+    card_state[0] = state.card_num[1]
+    card_state[1] = state.card_num[2]
+    card_state[2] = state.card_num[3]
+
+    used = np.zeros(8)
+    played_cards = sorted(state.played_cards)
+    size = len(played_cards)
+    if size >= 8:
+        for i in range(8):
+            used[i] = played_cards[size - 1 - i].value
+
+    return np.concatenate((hand_state, ground_state, card_state, used), axis=None)
+
+
+### Reference of the one-hot block: hand and played card bits by card index
+def one_hot_reference(state):
+    hand_bits = np.zeros(52)
+    played_bits = np.zeros(52)
+    for card in state.hand.cards:
+        hand_bits[card.index] = 1
+    for card in state.played_cards:
+        played_bits[card.index] = 1
+    return np.concatenate((state_parse_reference(state), hand_bits, played_bits))
+
+
+### Seeded random games, calling check with the states of all four players after every move. States are
+### checked right away, as the ground and played cards change while the game goes on.
+def play_games(num_games, check):
+    rng = random.Random(0)
+    env = TichuEnv()
+    env.set_team_names(['Team 0', 'Team 1'])
+
+    checked = 0
+    for seed in range(num_games):
+        state, player_id = env.reset(seed)
+        while not env.is_over():
+            check([env.get_state(i) for i in range(env.player_num)])
+            checked += 1
+            state, player_id = env.next_turn(rng.choice(state.legal_actions))
+    assert checked > 0
+
+
+def test_state_parse_matches_reference():
+    def check(states):
+        for state in states:
+            assert np.array_equal(state_parse(state), state_parse_reference(state))
+
+    play_games(20, check)
+
+
+def test_encode_states_matches_reference():
+    out = np.full((4, ONE_HOT_STATE_SIZE), -1.)
+
+    def check(states):
+        expected = np.array([state_parse_reference(state) for state in states])
+        assert np.array_equal(encode_states(states), expected)
+
+        ### A reused buffer is fully overwritten, with and without the one-hot block
+        assert encode_states(states, out=out, one_hot=True) is out
+        assert np.array_equal(out, np.array([one_hot_reference(state) for state in states]))
+        encode_states(states, out=out)
+        assert np.array_equal(out[:, :STATE_SIZE], expected)
+
+    play_games(20, check)
+
+
+def get_hand(*cards):
+    ### cards: (value, suit index) pairs
+    return Cards.from_mask(sum(1 << (4 * (value - 2) + suit) for value, suit in cards))
+
+
+def get_ground(ctype, value):
+    ground = Ground()
+    ground.type = ctype
+    ground.value = value
+    return ground
+
+
+def signature(actions):
+    return [(action.type, action.value, action.mask) for action in actions]
+
+
+### Reference legal move filter: the plays of the ground's type with a higher value, and the same length for
+### straights and pair sequences, sorted by value; then the bombs unless the ground is a bomb
+def get_legal_combination_reference(combinations, ground):
+    if ground.type == 'none':
+        return [action for same_type in combinations for action in same_type]
+
+    same_type = combinations[COMBINATION_TYPES.index(ground.type)]
+    legal = [action for action in same_type if action.value > ground.value and
+             (ground.type not in ('strat', 'strat_flush', 'pair_seq') or action.value // 100 == ground.value // 100)]
+    legal.sort(key=lambda action: action.value)
+
+    rt_set = [Cards(ctype='pass')] + legal
+    if ground.type != 'four' and ground.type != 'strat_flush':
+        rt_set += list(combinations[3]) + list(combinations[6])
+    return rt_set
+
+
+def test_get_legal_combination_matches_reference():
+    rng = random.Random(0)
+    for _ in range(300):
+        hand = Cards.from_mask(sum(1 << i for i in rng.sample(range(52), rng.randint(1, 14))))
+        combinations = hand.get_available_combination()
+        before = signature(action for same_type in combinations for action in same_type)
+
+        ### Grounds of every type, taken from the combinations of another hand
+        other = Cards.from_mask(sum(1 << i for i in rng.sample(range(52), 14))).get_available_combination()
+        grounds = [get_ground('none', 0)] + [get_ground(action.type, action.value)
+                                             for same_type in other for action in same_type]
+        for ground in grounds:
+            assert signature(get_legal_combination(combinations, ground)) == \
+                   signature(get_legal_combination_reference(combinations, ground))
+
+        ### Plain lists are accepted, and the combinations are never modified
+        assert signature(get_legal_combination([list(same_type) for same_type in combinations], grounds[-1])) == \
+               signature(get_legal_combination_reference(combinations, grounds[-1]))
+        assert signature(action for same_type in combinations for action in same_type) == before
+
+
+def test_bombs_beat_non_bombs():
+    ### Four tens and a straight flush 2-6 in spades
+    hand = get_hand((10, 0), (10, 1), (10, 2), (10, 3), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (14, 1))
+    combinations = hand.get_available_combination()
+
+    legal = get_legal_combination(combinations, get_ground('solo', 14))
+    assert [action.type for action in legal] == ['pass', 'four', 'strat_flush']
+
+    ### A four is only beaten by a higher four, and a straight flush only by a higher one of the same length
+    assert [action.type for action in get_legal_combination(combinations, get_ground('four', 5))] == ['pass', 'four']
+    assert [action.type for action in get_legal_combination(combinations, get_ground('four', 10))] == ['pass']
+    assert [action.type for action in get_legal_combination(combinations, get_ground('strat_flush', 501))] == \
+           ['pass', 'strat_flush']
+    assert [action.type for action in get_legal_combination(combinations, get_ground('strat_flush', 502))] == ['pass']
+
+
+def test_straights_need_the_same_length():
+    ### Straight 3-9 in mixed suits: straights of length 5, 6 and 7
+    hand = get_hand((3, 0), (4, 1), (5, 0), (6, 1), (7, 0), (8, 1), (9, 0))
+    combinations = hand.get_available_combination()
+
+    legal = get_legal_combination(combinations, get_ground('strat', 503))
+    assert [action.value for action in legal[1:]] == [504, 505]
+    legal = get_legal_combination(combinations, get_ground('strat', 602))
+    assert [action.value for action in legal[1:]] == [603, 604]
+    assert get_legal_combination(combinations, get_ground('strat', 803))[1:] == []
+
+
+def test_full_houses_are_ordered_by_value():
+    ### Full houses of threes over kings and of kings over threes, and of fives over either
+    hand = get_hand((3, 0), (3, 1), (3, 2), (13, 0), (13, 1), (13, 2), (5, 0), (5, 1), (5, 2))
+    combinations = hand.get_available_combination()
+
+    legal = get_legal_combination(combinations, get_ground('full', 2))
+    values = [action.value for action in legal[1:]]
+    assert values == sorted(values) and set(values) == {3, 5, 13}
+    assert all(action.value > 3 for action in get_legal_combination(combinations, get_ground('full', 3))[1:])
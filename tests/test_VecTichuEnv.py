@@ -0,0 +1,105 @@
+import gc
+import os
+
+import numpy as np
+import pytest
+
+from tichu.SubprocTichuEnv import SubprocTichuEnv
+from tichu.Util import STATE_SIZE
+from tichu.VecTichuEnv import VecTichuEnv
+
+
+def first_legal_actions(action_masks):
+    return np.argmax(action_masks, axis=1)
+
+
+def illegal_action(action_masks, i):
+    return int(np.argmin(action_masks[i]))
+
+
+### An illegal action in one game must not step any game, so states and buffers stay consistent
+def test_illegal_action_steps_no_game():
+    env = VecTichuEnv(4, seed=0)
+    observations, action_masks = env.reset()
+    for _ in range(5):
+        observations, action_masks, _, _ = env.step(first_legal_actions(action_masks))
+
+    before = (observations.copy(), action_masks.copy(), env.player_ids.copy(),
+              [env.envs[i].timestep for i in range(4)])
+    actions = first_legal_actions(action_masks)
+    actions[2] = illegal_action(action_masks, 2)
+    with pytest.raises(ValueError, match="in env 2"):
+        env.step(actions)
+
+    assert np.array_equal(env.observations, before[0])
+    assert np.array_equal(env.action_masks, before[1])
+    assert np.array_equal(env.player_ids, before[2])
+    assert [env.envs[i].timestep for i in range(4)] == before[3]
+
+    ### Stepping goes on with legal actions, and out of range or wrongly shaped actions are rejected too
+    env.step(first_legal_actions(action_masks))
+    with pytest.raises(ValueError):
+        env.step([env.action_num] * 4)
+    with pytest.raises(ValueError):
+        env.step([0] * 3)
+
+
+def test_subproc_illegal_action_steps_no_game():
+    with SubprocTichuEnv(4, num_workers=2, seed=0) as env:
+        observations, action_masks = env.reset()
+        observations, action_masks, _, _ = env.step(first_legal_actions(action_masks))
+
+        before = (observations.copy(), action_masks.copy(), env.player_ids.copy())
+        actions = first_legal_actions(action_masks)
+        actions[3] = illegal_action(action_masks, 3)
+        with pytest.raises(ValueError, match="in env 3"):
+            env.step(actions)
+
+        assert np.array_equal(env.observations, before[0])
+        assert np.array_equal(env.action_masks, before[1])
+        assert np.array_equal(env.player_ids, before[2])
+
+        ### Same games as a VecTichuEnv stepped with the same actions
+        vec_env = VecTichuEnv(4, seed=0)
+        vec_observations, vec_action_masks = vec_env.reset()
+        vec_env.step(first_legal_actions(vec_action_masks))
+        for _ in range(3):
+            actions = first_legal_actions(env.action_masks)
+            env.step(actions)
+            vec_env.step(actions)
+        assert np.array_equal(env.observations, vec_env.observations)
+
+
+def get_segment_paths(env):
+    return [os.path.join('/dev/shm', block.name.lstrip('/')) for block in env.blocks]
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='needs /dev/shm to list shared memory segments')
+def test_close_releases_workers_and_shared_memory():
+    env = SubprocTichuEnv(2, num_workers=2, seed=0)
+    env.reset()
+    paths = get_segment_paths(env)
+    processes = list(env.processes)
+    assert all(os.path.exists(path) for path in paths)
+
+    env.close()
+    env.close()
+    assert not any(os.path.exists(path) for path in paths)
+    assert not any(process.is_alive() for process in processes)
+
+
+### An env that is never closed is cleaned up by its finalizer once garbage collected
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='needs /dev/shm to list shared memory segments')
+def test_forgotten_env_is_finalized():
+    env = SubprocTichuEnv(2, num_workers=2, seed=0)
+    observations, _ = env.reset()
+    paths = get_segment_paths(env)
+    processes = list(env.processes)
+
+    del env
+    gc.collect()
+    assert not any(os.path.exists(path) for path in paths)
+    assert not any(process.is_alive() for process in processes)
+
+    ### Arrays returned by the env stay readable after it is gone
+    assert observations.shape == (2, STATE_SIZE)
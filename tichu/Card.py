@@ -1,7 +1,4 @@
-SUITS = {'Spade': '♠',
-         'Heart': '♡',
-         'Dia': '♢',
-         'Club': '♣'}
+from tichu.CombinationCache import CombinationCache
 
 CARD_VALUES = {'2': 2,
                '3': 3,
@@ -17,26 +14,54 @@ CARD_VALUES = {'2': 2,
                'K': 13,
                'A': 14}
 
+# Suit order inside a rank. A card's bit index is (value - 2) * 4 + suit index,
+# so iterating the bits of a hand mask yields the cards sorted by value.
+SUIT_INDEX = {'Spade': 0,
+              'Heart': 1,
+              'Dia': 2,
+              'Club': 3}
+
+### Order of the combination lists returned by Cards.get_available_combination
+COMBINATION_TYPES = ['solo', 'pair', 'triple', 'four', 'full', 'strat', 'strat_flush', 'pair_seq']
+
+
+### All 52 cards ordered by bit index, filled in by Card.__new__
+CARD_TABLE = [None] * 52
+
 
 class Card():
+    ### Cards are interned: Card(name, suit) always returns the same instance
+    __slots__ = ('name', 'suit', 'value', 'point', 'index')
 
-    def __init__(self, name=None, suit=None):
-        self.name = name
-        self.suit = suit
-        self.value = CARD_VALUES[self.name]
+    def __new__(cls, name=None, suit=None):
+        index = (CARD_VALUES[name] - 2) * 4 + SUIT_INDEX[suit]
+        card = CARD_TABLE[index]
+        if card is not None:
+            return card
 
-        self.point = 0
-        if self.name == '5':
-            self.point = 5
-        elif self.name == '10' or self.name == 'K':
-            self.point = 10
+        card = super(Card, cls).__new__(cls)
+        card.name = name
+        card.suit = suit
+        card.value = CARD_VALUES[name]
+        card.index = index
 
-        if name != '10':
-            self.image = ['┌┄┄┄┑', '┆' + self.name + '  ┆', '┆ ' + SUITS[self.suit] + ' ┆', '┆  ' + self.name + '┆',
-                          '┕┄┄┄┙']
-        else:
-            self.image = ['┌┄┄┄┑', '┆' + self.name + ' ┆', '┆ ' + SUITS[self.suit] + ' ┆', '┆ ' + self.name + '┆',
-                          '┕┄┄┄┙']
+        card.point = 0
+        if name == '5':
+            card.point = 5
+        elif name == '10' or name == 'K':
+            card.point = 10
+
+        CARD_TABLE[index] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.name, self.suit)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def __ge__(self, other):
         return self.value >= other.value
@@ -51,320 +76,173 @@ class Card():
         return self.value < other.value
 
     def __eq__(self, other):
-        return self.value == other.value and self.suit == other.suit
+        return self is other
 
     def __ne__(self, other):
-        return self.value != other.value or self.suit != other.suit
+        return self is not other
 
     def __hash__(self):
-        return hash((self.name, self.suit))
+        return self.index
 
     def show(self):
-        print(self.name + ' ' + self.suit)
+        from tichu.Renderer import render_card, show
+        show(render_card(self))
 
 
 class Cards():
 
     def __init__(self, card_list=None, value=0, ctype='none'):
+        self.mask = 0
         if card_list != None:
-            self.cards = list()
             for i in card_list:
-                self.cards.append(i)
-            self.cards.sort()
-            self.size = len(card_list)
-        else:
-            self.size = 0
-            self.cards = list()
-        self.num_show = 13
+                self.mask |= 1 << i.index
+        self.size = popcount(self.mask)
+        self._cards = None
         self.value = value
         self.type = ctype
 
+    @classmethod
+    def from_mask(cls, mask, value=0, ctype='none'):
+        new_cards = cls(value=value, ctype=ctype)
+        new_cards.mask = mask
+        new_cards.size = popcount(mask)
+        return new_cards
+
+    @property
+    def cards(self):
+        ### Sorted card list, decoded from the mask on first access
+        if self._cards is None:
+            self._cards = mask_to_cards(self.mask)
+        return self._cards
+
+    ### Rendering lives in tichu.Renderer, imported only when something is shown
     def show(self):
-        if self.size == 0 and self.type == 'pass':
-            print('  PASS')
-        else:
-            remain = self.size
-            iter_num = 0
-
-            # print(f"  Card value: {self.value}, Type: {self.type}, Remaining: {remain}")
-            # return
-
-            while remain > 0:
-                if remain < self.num_show + 1:
-                    for i in range(5):
-                        for j in range(remain):
-                            print(self.cards[iter_num * self.num_show + j].image[i], end='')
-                        print()
-                    remain = 0
-                else:
-                    for i in range(5):
-                        for j in range(self.num_show):
-                            print(self.cards[iter_num * self.num_show + j].image[i], end='')
-                        print()
-                    remain = remain - self.num_show
-                    iter_num = iter_num + 1
+        from tichu.Renderer import render_cards, show
+        show(render_cards(self))
 
     def set_combination(self):
-        card_set = self.cards
-        card_set.sort()
-
-        ### pass
-        if len(card_set) == 0:
-            self.type = 'pass'
-            self.value = 0
-            return
-
-        ### solo
-        if len(card_set) == 1:
-            self.type = 'solo'
-            self.value = card_set[0].value
-            return
-
-        ### pair
-        if len(card_set) == 2 and card_set[0].value == card_set[1].value:
-            self.type = 'pair'
-            self.value = card_set[0].value
-            return
-
-        ### triple
-        if len(card_set) == 3 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value:
-            self.type = 'triple'
-            self.value = card_set[0].value
-            return
-
-        ### four
-        if len(card_set) == 4 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value and \
-                card_set[2].value == card_set[3].value:
-            self.type = 'four'
-            self.value = card_set[0].value
-            return
-
-        ### full
-        if len(card_set) == 5 and card_set[0].value == card_set[1].value and card_set[1].value == card_set[2].value and \
-                card_set[3].value == card_set[4].value:
-            self.type = 'full'
-            self.value = card_set[0].value
-            return
-        if len(card_set) == 5 and card_set[0].value == card_set[1].value and card_set[2].value == card_set[3].value and \
-                card_set[3].value == card_set[4].value:
-            self.type = 'full'
-            self.value = card_set[2].value
-            return
-
-        ### strat and strat_flush
-        if len(card_set) >= 5:
-            strat = True
-            flush = True
-            for i in range(len(card_set) - 1):
-                if card_set[i].value + 1 == card_set[i + 1].value:
-                    if card_set[i].suit == card_set[i + 1].suit:
-                        pass
-                    else:
-                        flush = False
-                else:
-                    strat = False
-                    break
-            if strat == True and flush == True:
-                self.type = 'strat_flush'
-                self.value = 100 * len(card_set) + card_set[0].value
-                return
-            elif strat == True and flush == False:
-                self.type = 'strat'
-                self.value = 100 * len(card_set) + card_set[0].value
-                return
-            else:
-                pass
-
-        ### pair_seq
-        if len(card_set) >= 4 and len(card_set) % 2 == 0:
-            pair_seq = True
-            for i in range(len(card_set) - 1):
-                if i % 2 == 0 and card_set[i].value == card_set[i + 1].value:
-                    pass
-                elif i % 2 == 1 and card_set[i].value + 1 == card_set[i + 1].value:
-                    pass
-                else:
-                    pair_seq = False
-                    break
-            if pair_seq == True:
-                self.type = 'pair_seq'
-                self.value = 100 * len(card_set) + card_set[0].value
-                return
-
-        ### none
-        self.type = 'none'
-        return
+        ctype, value = classify_mask(self.mask)
+        self.type = ctype
+        if value is not None:
+            self.value = value
 
     def get_available_combination(self):
+        ### Results are immutable Combinations, shared between hands through the cache
+        combinations = combination_cache.get(self.mask)
+        if combinations is None:
+            combinations = Combinations(self.enumerate_combination())
+            combination_cache.put(self.mask, combinations)
+        return combinations
+
+    def enumerate_combination(self):
         hand_l = self.cards
-        hand_l.sort()
 
-        solo = list()
-        pair = list()
-        triple = list()
-        four = list()
-        full = list()
+        solo = list(iter_solo(hand_l))
+        pair = list(iter_pair(hand_l))
+        triple = list(iter_triple(hand_l))
+        four = list(iter_four(hand_l))
+        full = list(iter_full(pair, triple))
+
         strat = list()
         strat_flush = list()
-        pair_seq = list()
-
-        ### solo
-        for i in range(len(hand_l)):
-            solo.append(Cards(card_list=[hand_l[i]], value=hand_l[i].value, ctype='solo'))
-
-        ### pair
-        for i in range(len(hand_l) - 1):
-            if hand_l[i].value == hand_l[i + 1].value:
-                pair.append(Cards(card_list=[hand_l[i], hand_l[i + 1]], value=hand_l[i].value, ctype='pair'))
-            try:
-                if hand_l[i].value == hand_l[i + 2].value:
-                    pair.append(Cards(card_list=[hand_l[i], hand_l[i + 2]], value=hand_l[i].value, ctype='pair'))
-                if hand_l[i].value == hand_l[i + 3].value:
-                    pair.append(Cards(card_list=[hand_l[i], hand_l[i + 3]], value=hand_l[i].value, ctype='pair'))
-            except:
-                pass
-
-        ### triple
-        for i in range(len(hand_l) - 2):
-            if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 2].value:
-                triple.append(
-                    Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 2]], value=hand_l[i].value, ctype='triple'))
-            try:
-                if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 3].value:
-                    triple.append(Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 3]], value=hand_l[i].value,
-                                        ctype='triple'))
-                if hand_l[i].value == hand_l[i + 2].value and hand_l[i + 2].value == hand_l[i + 3].value:
-                    triple.append(Cards(card_list=[hand_l[i], hand_l[i + 2], hand_l[i + 3]], value=hand_l[i].value,
-                                        ctype='triple'))
-            except:
-                pass
-
-        ### four card (bomb)
-        for i in range(len(hand_l) - 3):
-            if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 2].value and hand_l[
-                i + 2].value == hand_l[i + 3].value:
-                four.append(
-                    Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 2], hand_l[i + 3]], value=hand_l[i].value,
-                          ctype='four'))
-
-        ### full house
-        for i in pair:
-            for j in triple:
-                if i.value != j.value:
-                    full.append(Cards(card_list=i.cards + j.cards, value=j.value, ctype='full'))
-
-        ### straight
-        for i in range(len(hand_l) - 4):
-            set_cards = list()
-            set_cards.append(list())
-            set_cards[0].append(hand_l[i])
-            j = i
-            while True:
-                if hand_l[j].value == hand_l[j + 1].value:
-                    if len(set_cards[0]) != 1:
-                        set_num = len(set_cards)
-                        set_cards.append(list())
-                        set_cards[set_num] = set_cards[set_num - 1][:]
-                        set_cards[set_num].pop()
-                        set_cards[set_num].append(hand_l[j + 1])
-                        if len(set_cards[0]) > 4:
-                            #                            strat.append( Cards(card_list=copy.deepcopy(set_cards[set_num]), value=int(len(set_cards[set_num-1])*1000 + hand_l[i].value), ctype='strat'))
-                            strat.append(Cards(card_list=set_cards[set_num],
-                                               value=int(len(set_cards[set_num - 1]) * 100 + hand_l[i].value),
-                                               ctype='strat'))
-                elif hand_l[j].value + 1 == hand_l[j + 1].value:
-                    for k in range(len(set_cards)):
-                        set_cards[k].append(hand_l[j + 1])
-                    if len(set_cards[0]) > 4:
-                        for k in range(len(set_cards)):
-                            #                            strat.append( Cards(card_list=copy.deepcopy(set_cards[k]), value=int(len(set_cards[k])*1000 + hand_l[i].value), ctype='strat'))
-                            strat.append(
-                                Cards(card_list=set_cards[k], value=int(len(set_cards[k]) * 100 + hand_l[i].value),
-                                      ctype='strat'))
-                else:
-                    break
-                if j < len(hand_l) - 2:
-                    j = j + 1
-                else:
-                    break
-
-        ### straight flush (bomb)
-        remove_set = list()
-        for i in strat:
-            suit = i.cards[0].suit
-            check = 1
-            for j in i.cards:
-                if suit == j.suit:
-                    pass
-                else:
-                    check = 0
-                    break
-
-            if check:
-                remove_set.append(i)
-                cards = i
-                cards.type = 'strat_flush'
-                strat_flush.append(cards)
-        for i in remove_set:
-            strat.remove(i)
-
-        ### pair sequence
-        for i in range(len(pair) - 1):
-            set_pair = list()
-            set_pair.append(list())
-            set_pair[0] += pair[i].cards
-            j = i
-            while True:
-                if pair[j].value == pair[j + 1].value:
-                    if len(set_pair[0]) != 2:
-                        set_num = len(set_pair)
-                        set_pair.append(list())
-                        set_pair[set_num] = set_pair[set_num - 1][:]
-                        set_pair[set_num].remove(pair[j].cards[0])
-                        set_pair[set_num].remove(pair[j].cards[1])
-                        set_pair[set_num] += pair[j + 1].cards
-                        pair_seq.append(
-                            Cards(card_list=set_pair[set_num], value=int(len(set_pair[set_num]) * 100 + pair[i].value),
-                                  ctype='pair_seq'))
-                elif pair[j].value + 1 == pair[j + 1].value:
-                    for k in range(len(set_pair)):
-                        set_pair[k] += pair[j + 1].cards
-                        pair_seq.append(Cards(card_list=set_pair[k], value=int(len(set_pair[k]) * 100 + pair[i].value),
-                                              ctype='pair_seq'))
-                else:
-                    break
-                if j < len(pair) - 2:
-                    j = j + 1
-                else:
-                    break
+        for i in iter_strat(hand_l):
+            if i.type == 'strat':
+                strat.append(i)
+            else:
+                strat_flush.append(i)
+
+        pair_seq = list(iter_pair_seq(pair))
 
         return [solo, pair, triple, four, full, strat, strat_flush, pair_seq]
 
+    def iter_combination(self, ctype):
+        ### Lazily yield the combinations of one type, in the order of get_available_combination
+        combinations = combination_cache.peek(self.mask)
+        if combinations is not None:
+            return iter(combinations[COMBINATION_TYPES.index(ctype)])
+
+        hand_l = self.cards
+        if ctype == 'solo':
+            return iter_solo(hand_l)
+        elif ctype == 'pair':
+            return iter_pair(hand_l)
+        elif ctype == 'triple':
+            return iter_triple(hand_l)
+        elif ctype == 'four':
+            return iter_four(hand_l)
+        elif ctype == 'full':
+            return iter_full(iter_pair(hand_l), list(iter_triple(hand_l)))
+        elif ctype == 'strat' or ctype == 'strat_flush':
+            return (i for i in iter_strat(hand_l) if i.type == ctype)
+        elif ctype == 'pair_seq':
+            return iter_pair_seq(list(iter_pair(hand_l)))
+        else:
+            raise ValueError("[iter_combination] Wrong combination type")
+
     def add(self, card):
-        self.cards.append(card)
-        self.size = self.size + 1
-        self.cards.sort()
+        bit = 1 << card.index
+        if not self.mask & bit:
+            self.mask |= bit
+            self.size = self.size + 1
+            self._cards = None
 
     def remove(self, card):
-        self.cards.remove(card)
+        bit = 1 << card.index
+        if not self.mask & bit:
+            raise ValueError("[Cards.remove] Card not in cards")
+        self.mask ^= bit
         self.size = self.size - 1
+        self._cards = None
+
+    def __contains__(self, card):
+        return (self.mask >> card.index) & 1 == 1
 
     def __add__(self, cards):
-        new_cards = Cards()
-        new_cards.cards = self.cards + cards.cards
-        new_cards.cards.sort()
-        new_cards.size = self.size + cards.size
-        return new_cards
+        return Cards.from_mask(self.mask | cards.mask)
 
     def __sub__(self, cards):
-        new_cards = Cards()
-        self_set = set(self.cards)
-        sub_set = set(cards.cards)
-        self_set = self_set - sub_set
-        new_cards.cards = list(self_set)
-        new_cards.cards.sort()
-        new_cards.size = len(self_set)
-        return new_cards
+        return Cards.from_mask(self.mask & ~cards.mask)
+
+    ### In-place union/difference, so dealing refills reused Deck and hand objects
+    def __iadd__(self, cards):
+        self.set_mask(self.mask | cards.mask)
+        return self
+
+    def __isub__(self, cards):
+        self.set_mask(self.mask & ~cards.mask)
+        return self
+
+    def set_mask(self, mask):
+        self.mask = mask
+        self.size = popcount(mask)
+        self._cards = None
+
+
+class Combinations(tuple):
+    ### The eight combination lists of a hand, ordered as COMBINATION_TYPES. They are tuples and are
+    ### never modified, so one instance can be shared by the cache, players and game states.
+
+    def __new__(cls, combinations):
+        self = super(Combinations, cls).__new__(cls, [tuple(i) for i in combinations])
+        self.by_value = [None] * len(self)
+        self.bombs = self[3] + self[6]
+        return self
+
+    def get_by_value(self, idx):
+        ### (values, combinations) of one type sorted by value, built on first use for bisecting
+        if self.by_value[idx] is None:
+            combinations = tuple(sorted(self[idx], key=lambda i: i.value))
+            self.by_value[idx] = ([i.value for i in combinations], combinations)
+        return self.by_value[idx]
+
+    def drop(self, mask):
+        ### Remove every combination that uses a card of mask; built value indexes are kept
+        new_combinations = Combinations([[i for i in combination if not i.mask & mask] for combination in self])
+        for idx, by_value in enumerate(self.by_value):
+            if by_value is not None:
+                combinations = tuple([i for i in by_value[1] if not i.mask & mask])
+                new_combinations.by_value[idx] = ([i.value for i in combinations], combinations)
+        return new_combinations
 
 
 class Deck(Cards):
@@ -372,9 +250,180 @@ class Deck(Cards):
     def __init__(self):
         super(Deck, self).__init__()
 
-        names = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        suits = ['Spade', 'Heart', 'Dia', 'Club']
-
-        for i in suits:
-            for j in names:
-                super(Deck, self).add(card=Card(j, i))
+        self.reset()
+
+    def reset(self):
+        self.set_mask(FULL_DECK_MASK)
+
+
+### Combination generators over a sorted card list, used by Cards.enumerate_combination
+### and Cards.iter_combination. Each yields its combinations in a fixed order.
+def iter_solo(hand_l):
+    for i in range(len(hand_l)):
+        yield Cards(card_list=[hand_l[i]], value=hand_l[i].value, ctype='solo')
+
+
+def iter_pair(hand_l):
+    for i in range(len(hand_l) - 1):
+        if hand_l[i].value == hand_l[i + 1].value:
+            yield Cards(card_list=[hand_l[i], hand_l[i + 1]], value=hand_l[i].value, ctype='pair')
+        if i + 2 < len(hand_l) and hand_l[i].value == hand_l[i + 2].value:
+            yield Cards(card_list=[hand_l[i], hand_l[i + 2]], value=hand_l[i].value, ctype='pair')
+            if i + 3 < len(hand_l) and hand_l[i].value == hand_l[i + 3].value:
+                yield Cards(card_list=[hand_l[i], hand_l[i + 3]], value=hand_l[i].value, ctype='pair')
+
+
+def iter_triple(hand_l):
+    for i in range(len(hand_l) - 2):
+        if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 2].value:
+            yield Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 2]], value=hand_l[i].value, ctype='triple')
+        if i + 3 < len(hand_l):
+            if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 3].value:
+                yield Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 3]], value=hand_l[i].value,
+                            ctype='triple')
+            if hand_l[i].value == hand_l[i + 2].value and hand_l[i + 2].value == hand_l[i + 3].value:
+                yield Cards(card_list=[hand_l[i], hand_l[i + 2], hand_l[i + 3]], value=hand_l[i].value,
+                            ctype='triple')
+
+
+### four card (bomb)
+def iter_four(hand_l):
+    for i in range(len(hand_l) - 3):
+        if hand_l[i].value == hand_l[i + 1].value and hand_l[i + 1].value == hand_l[i + 2].value and hand_l[
+            i + 2].value == hand_l[i + 3].value:
+            yield Cards(card_list=[hand_l[i], hand_l[i + 1], hand_l[i + 2], hand_l[i + 3]], value=hand_l[i].value,
+                        ctype='four')
+
+
+### full house: every pair with every triple of another value
+def iter_full(pair, triple):
+    for i in pair:
+        for j in triple:
+            if i.value != j.value:
+                yield Cards.from_mask(i.mask | j.mask, value=j.value, ctype='full')
+
+
+### straight and straight flush (bomb)
+### Every run of consecutive values is built from each possible card per value, ordered by
+### start card, then length, then card choice. Dropping the combinations that use a played
+### card therefore gives exactly the combinations of the remaining hand.
+def iter_strat(hand_l):
+    value_cards = dict()
+    for i in hand_l:
+        value_cards.setdefault(i.value, list()).append(i)
+
+    for i in hand_l:
+        set_cards = [[i]]
+        value = i.value + 1
+        while value in value_cards:
+            set_cards = [k + [j] for k in set_cards for j in value_cards[value]]
+            if len(set_cards[0]) > 4:
+                for k in set_cards:
+                    if all(j.suit == i.suit for j in k):
+                        yield Cards(card_list=k, value=len(k) * 100 + i.value, ctype='strat_flush')
+                    else:
+                        yield Cards(card_list=k, value=len(k) * 100 + i.value, ctype='strat')
+            value = value + 1
+
+
+### pair sequence, built the same way from the pairs
+def iter_pair_seq(pair):
+    value_pairs = dict()
+    for i in pair:
+        value_pairs.setdefault(i.value, list()).append(i)
+
+    for i in pair:
+        set_pair = [i.mask]
+        value = i.value + 1
+        length = 4
+        while value in value_pairs:
+            set_pair = [k | j.mask for k in set_pair for j in value_pairs[value]]
+            for k in set_pair:
+                yield Cards.from_mask(k, value=length * 100 + i.value, ctype='pair_seq')
+            value = value + 1
+            length = length + 2
+
+
+### Type and value of a card mask, from its rank histogram. Returns the same type/value as the
+### card-by-card checks this replaced; value is None for 'none', which leaves Cards.value unchanged.
+def classify_mask(mask):
+    size = popcount(mask)
+
+    ### pass
+    if size == 0:
+        return 'pass', 0
+
+    ### lowest card, and bit 4 * (value - 2) of its value
+    low_card = (mask & -mask).bit_length() - 1
+    low = low_card & ~3
+    value = (low >> 2) + 2
+
+    ### solo, pair, triple, four: all cards share one value
+    if mask >> low < 16:
+        return SAME_VALUE_TYPES[size], value
+    if size < 4:
+        return 'none', None
+
+    ### bit 4 * (value - 2) is set for every value present
+    ranks = (mask | mask >> 1 | mask >> 2 | mask >> 3) & RANK_MASK
+    num_ranks = popcount(ranks)
+
+    ### full
+    if size == 5 and num_ranks == 2:
+        count = NIBBLE_COUNT[(mask >> low) & 15]
+        if count == 3:
+            return 'full', value
+        if count == 2:
+            return 'full', (ranks.bit_length() - 1) // 4 + 2
+
+    run = ranks >> low == RUN_MASKS[num_ranks]
+
+    ### strat and strat_flush
+    if size >= 5 and num_ranks == size and run:
+        if mask & SUIT_MASKS[low_card & 3] == mask:
+            return 'strat_flush', 100 * size + value
+        return 'strat', 100 * size + value
+
+    ### pair_seq
+    if size >= 4 and num_ranks * 2 == size and run:
+        for i in range(low, low + 4 * num_ranks, 4):
+            if NIBBLE_COUNT[(mask >> i) & 15] != 2:
+                return 'none', None
+        return 'pair_seq', 100 * size + value
+
+    ### none
+    return 'none', None
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+### int.bit_count is only available from Python 3.10
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+
+
+def mask_to_cards(mask):
+    cards = list()
+    while mask:
+        low = mask & -mask
+        cards.append(CARD_TABLE[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+for name in CARD_VALUES:
+    for suit in SUIT_INDEX:
+        Card(name, suit)
+FULL_DECK_MASK = (1 << len(CARD_TABLE)) - 1
+
+### Lookup tables for classify_mask
+RANK_MASK = sum(1 << (4 * i) for i in range(13))
+SUIT_MASKS = [RANK_MASK << i for i in range(4)]
+RUN_MASKS = [sum(1 << (4 * i) for i in range(length)) for length in range(14)]
+NIBBLE_COUNT = [popcount(i) for i in range(16)]
+SAME_VALUE_TYPES = ['pass', 'solo', 'pair', 'triple', 'four']
+
+### Shared by all hands; resize(0) or disable() turns caching off
+combination_cache = CombinationCache()
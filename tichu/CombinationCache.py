@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+
+### Bounded LRU cache for combination enumeration, keyed by hand mask
+class CombinationCache:
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.enabled = maxsize > 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key):
+        ### Look up without touching the counters or the LRU order
+        if not self.enabled:
+            return None
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        self.enabled = maxsize > 0
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+
+    def enable(self):
+        self.enabled = self.maxsize > 0
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'enabled': self.enabled}
@@ -1,7 +1,10 @@
-from tichu.Card import Card, Deck
+import random
+
+from tichu.Card import Card, Cards, Deck
+from tichu.GameSnapshot import GameSnapshot
 from tichu.Player import Player
 from tichu.Round import Round
-from tichu.Util import Deal
+from tichu.Util import Deal, Ground
 
 
 class Game:
@@ -10,27 +13,44 @@ class Game:
         self.env = env
         self.rounds_played = 1
         self.rounds_played_per_player = {0: 0, 1: 0, 2: 0, 3: 0}
+        self.deck = None
+        self.players = list()
+        self.round = None
 
-    def init_game(self):
+    # rng: random source for dealing. deal: optional four hand masks to deal instead
+    def init_game(self, rng=random, deal=None):
         # Initialize parameters
         self.first_player = 0
+        self.rounds_played = 1
+        self.rounds_played_per_player = {0: 0, 1: 0, 2: 0, 3: 0}
 
-        # Initialize deck
-        self.deck = Deck()
-
-        # Initialize players
-        self.players = list()
-        for i in range(self.num_players):
-            player = Player(player_id=i)
-            if i == 0 or i == 2:
+        # Initialize deck, reusing the one of the previous game
+        if self.deck is None:
+            self.deck = Deck()
+        else:
+            self.deck.reset()
+
+        # Initialize players, reusing the ones of the previous game
+        if not self.players:
+            self.players = [Player(player_id=i) for i in range(self.num_players)]
+        for player in self.players:
+            player.reset()
+            if player.player_id == 0 or player.player_id == 2:
                 player.team = self.env.team_names[0]
             else:
                 player.team = self.env.team_names[1]
-            self.players.append(player)
 
         # Deal cards
         for i in range(self.num_players):
-            self.deck, self.players[i].hand = Deal(self.deck, self.players[i].hand, deck=1, card_num=13)
+            if deal is None:
+                self.deck, self.players[i].hand = Deal(self.deck, self.players[i].hand, deck=1, card_num=13, rng=rng)
+            else:
+                self.deck, self.players[i].hand = Deal(self.deck, self.players[i].hand, deck=0,
+                                                       card_deal=Cards.from_mask(deal[i]).cards)
+
+        # Compact log of the game: dealt hand masks and the mask of every action (0 for pass)
+        self.deal_masks = tuple(player.hand.mask for player in self.players)
+        self.action_log = list()
 
         ###DEBUG
         #        strat_flush = [Card('2','Spade'), Card('3','Spade'), Card('4','Spade'),Card('5','Spade'),Card('6','Spade')]
@@ -42,7 +62,7 @@ class Game:
 
         # Show hands and determine first player
         for i in range(self.num_players):
-            if self.players[i].hand.cards.count(Card('2', 'Club')) == 1:
+            if Card('2', 'Club') in self.players[i].hand:
                 self.first_player = i
                 self.env.positional_outcome[self.players[i].team] = 1
                 self.env.positional_outcome[self.players[(i + 1) % 4].team] = 0
@@ -53,13 +73,60 @@ class Game:
         return self.round.get_state(self.players, self.first_player), self.first_player
 
     def next_turn(self, action):
-
+        self.action_log.append(action.mask)
         self.round.proceed_round(self.players, action)
         next_player_id = self.round.current_player
         state = self.round.get_state(self.players, next_player_id)
 
         return state, next_player_id
 
+    def snapshot(self):
+        return GameSnapshot(self)
+
+    def restore(self, snapshot):
+        self.first_player = snapshot.first_player
+        self.rounds_played = snapshot.rounds_played
+        self.rounds_played_per_player = dict(snapshot.rounds_played_per_player)
+        if self.deck is None:
+            self.deck = Deck()
+        self.deck.set_mask(snapshot.deck)
+
+        if not self.players:
+            self.players = [Player(player_id=i) for i in range(self.num_players)]
+        for player, (hand, won_card, point, accumulated_points, combinations, combination_mask) in zip(
+                self.players, snapshot.players):
+            player.hand = Cards.from_mask(hand)
+            player.won_card = Cards.from_mask(won_card)
+            player.point = point
+            player.accumulated_points = list(accumulated_points)
+            player.combinations = combinations
+            player.combination_mask = combination_mask
+            player.team = self.env.team_names[player.player_id % 2]
+
+        (current_player, finish_order, num_out, num_out_player, out_mask, out_now_mask, num_pass, ground_type,
+         ground_value, ground_cards, ground_player_id, used) = snapshot.round
+        if self.round is None:
+            self.round = Round(self.num_players, current_player, self)
+        self.round.current_player = current_player
+        self.round.finish_order = list(finish_order)
+        self.round.num_out = num_out
+        self.round.num_out_player = num_out_player
+        self.round.out_mask = out_mask
+        self.round.out_now_mask = out_now_mask
+        self.round.num_pass = num_pass
+        self.round.ground = Ground()
+        self.round.ground.type = ground_type
+        self.round.ground.value = ground_value
+        self.round.ground.cards = Cards.from_mask(ground_cards)
+        self.round.ground.player_id = ground_player_id
+        self.round.used = list(used)
+
+        self.deal_masks = snapshot.deal_masks
+        self.action_log = list(snapshot.action_log)
+
+        self.env.positional_outcome = dict(snapshot.positional_outcome)
+        self.env.rounds_to_win = snapshot.rounds_to_win
+
     def get_active_player(self, player_id):
         return self.round.get_state(self.players, player_id)
 
@@ -0,0 +1,138 @@
+import glob
+import os
+
+import numpy as np
+
+### Entries of accumulated_points kept per seat: one per trick (at most 52) plus the final points
+MAX_ACCUMULATED_POINTS = 53
+
+### Characters kept per agent strategy name; longer names are rejected rather than truncated
+MAX_AGENT_NAME = 32
+
+### Game record: dealt hand masks, strategy of each seat's agent, the seats' accumulated_points
+### padded with -1 (num_points holds their lengths), finishing order padded with -1, rounds_to_win
+### and the final get_points()
+RECORD_DTYPE = np.dtype([('deal', '<u8', (4,)),
+                         ('agents', '<U%d' % MAX_AGENT_NAME, (4,)),
+                         ('accumulated_points', '<i2', (4, MAX_ACCUMULATED_POINTS)),
+                         ('num_points', '<u1', (4,)),
+                         ('finish_order', '<i1', (4,)),
+                         ('rounds_to_win', '<i2'),
+                         ('points', '<i2', (4,))])
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+### .npy header for a one-dimensional record array of num_records rows, padded to header_size bytes
+def npy_header(num_records, header_size):
+    header = repr({'descr': np.lib.format.dtype_to_descr(RECORD_DTYPE), 'fortran_order': False,
+                   'shape': (num_records,)})
+    header_len = header_size - len(NPY_MAGIC) - 2
+    header = header.ljust(header_len - 1) + '\n'
+    if len(header) != header_len:
+        raise ValueError("[npy_header] Header does not fit in " + str(header_size) + " bytes")
+    return NPY_MAGIC + header_len.to_bytes(2, 'little') + header.encode('latin1')
+
+
+### Streams one fixed-width record per game to append-only .npy shards in directory,
+### named prefix-00000.npy, prefix-00001.npy, ... with at most shard_size records each.
+### Records are buffered and appended buffer_size at a time; the shard header is rewritten on
+### every flush, so flushed shards are always valid .npy files that np.load can memory-map.
+class GameRecorder:
+
+    def __init__(self, directory, shard_size=1 << 20, buffer_size=1024, prefix='games'):
+        if shard_size < 1 or buffer_size < 1:
+            raise ValueError("[GameRecorder] shard_size and buffer_size must be positive")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+
+        # Header size fitting the largest shard, a multiple of 64 bytes as in numpy's own files
+        header_size = len(NPY_MAGIC) + 2 + len(repr({'descr': np.lib.format.dtype_to_descr(RECORD_DTYPE),
+                                                      'fortran_order': False, 'shape': (shard_size,)})) + 1
+        self.header_size = -(-header_size // 64) * 64
+
+        self.buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self.num_buffered = 0
+
+        # Continue after the shards already in the directory
+        self.shard = len(glob.glob(os.path.join(directory, prefix + '-*.npy')))
+        self.file = None
+        self.num_records = 0
+
+    def write(self, deal_masks, agents, accumulated_points, finish_order, rounds_to_win, points):
+        for agent in agents:
+            if len(agent) > MAX_AGENT_NAME:
+                raise ValueError("[GameRecorder.write] Agent name " + repr(agent) + " is longer than "
+                                 + str(MAX_AGENT_NAME) + " characters")
+
+        record = self.buffer[self.num_buffered]
+        record['deal'] = deal_masks
+        record['agents'] = agents
+        record['accumulated_points'] = -1
+        for seat, seat_points in enumerate(accumulated_points):
+            record['accumulated_points'][seat, :len(seat_points)] = seat_points
+            record['num_points'][seat] = len(seat_points)
+        record['finish_order'] = -1
+        record['finish_order'][:len(finish_order)] = finish_order
+        record['rounds_to_win'] = rounds_to_win
+        record['points'] = points
+
+        self.num_buffered += 1
+        if self.num_buffered == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        start = 0
+        while start < self.num_buffered:
+            if self.file is None:
+                self.file = open(self.get_shard_path(self.shard), 'w+b')
+                self.file.write(npy_header(0, self.header_size))
+                self.num_records = 0
+
+            count = min(self.num_buffered - start, self.shard_size - self.num_records)
+            self.file.seek(0, os.SEEK_END)
+            self.file.write(self.buffer[start:start + count].tobytes())
+            self.num_records += count
+            self.file.seek(0)
+            self.file.write(npy_header(self.num_records, self.header_size))
+            self.file.flush()
+            start += count
+
+            if self.num_records == self.shard_size:
+                self.file.close()
+                self.file = None
+                self.shard += 1
+
+        self.num_buffered = 0
+
+    def get_shard_path(self, shard):
+        return os.path.join(self.directory, '%s-%05d.npy' % (self.prefix, shard))
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.shard += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+### Memory-mapped record arrays of every shard in directory, in shard order
+def open_game_records(directory, prefix='games'):
+    return [np.load(path, mmap_mode='r') for path in sorted(glob.glob(os.path.join(directory, prefix + '-*.npy')))]
+
+
+### All records of directory in one in-memory array
+def load_game_records(directory, prefix='games'):
+    shards = open_game_records(directory, prefix)
+    if not shards:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.concatenate(shards)
@@ -0,0 +1,29 @@
+# Compact copy of everything needed to continue a game, see Game.snapshot and Game.restore.
+# Cards are stored as masks; combination indexes are immutable and are shared, not copied.
+class GameSnapshot:
+    __slots__ = ('first_player', 'rounds_played', 'rounds_played_per_player', 'deck', 'players', 'round',
+                 'deal_masks', 'action_log', 'positional_outcome', 'rounds_to_win')
+
+    def __init__(self, game):
+        self.first_player = game.first_player
+        self.rounds_played = game.rounds_played
+        self.rounds_played_per_player = tuple(game.rounds_played_per_player.items())
+        self.deck = game.deck.mask
+
+        # (hand, won_card, point, accumulated_points, combinations, combination_mask) per player
+        self.players = tuple((player.hand.mask, player.won_card.mask, player.point,
+                              tuple(player.accumulated_points), player.combinations, player.combination_mask)
+                             for player in game.players)
+
+        # (current_player, finish_order, num_out, num_out_player, out_mask, out_now_mask, num_pass,
+        #  ground type, ground value, ground cards, ground player_id, used)
+        r = game.round
+        self.round = (r.current_player, tuple(r.finish_order), r.num_out, r.num_out_player, r.out_mask,
+                      r.out_now_mask, r.num_pass, r.ground.type, r.ground.value, r.ground.cards.mask,
+                      r.ground.player_id, tuple(r.used))
+
+        self.deal_masks = game.deal_masks
+        self.action_log = tuple(game.action_log)
+
+        self.positional_outcome = tuple(game.env.positional_outcome.items())
+        self.rounds_to_win = game.env.rounds_to_win
@@ -1,19 +1,69 @@
+from tichu.Card import COMBINATION_TYPES
+from tichu.Util import Ground, get_legal_combination
+
+
 # GameState of the game
+# action and legal_actions are computed on first access, for the hand and ground of the moment
+# the state was created
 class GameState:
+    __slots__ = ('hand', 'ground', 'played_cards', 'card_num', 'player', 'ground_type', 'ground_value',
+                 '_action', '_legal_actions')
+
     # Current hand of the active player
-    hand = None
+    hand: 'Cards'
 
     # Current cards on the ground TODO evaluate the cut
-    ground = None
+    ground: 'Ground'
+
+    # All played cards
+    played_cards: list
+
+    # num of cards of players 0-3
+    card_num: tuple
+
+    player: 'Player'
+    ground_type: str
+    ground_value: int
+
+    def __init__(self, player, ground, played_cards, card_num):
+        self.hand = player.hand
+        self.ground = ground
+        self.played_cards = played_cards
+        self.card_num = card_num
+
+        self.player = player
+        self.ground_type = ground.type
+        self.ground_value = ground.value
+        self._action = None
+        self._legal_actions = None
 
     # All actions of the hand ignoring current ground
-    action = None
+    @property
+    def action(self):
+        if self._action is None:
+            if self.player.hand is self.hand:
+                self._action = self.player.get_available_combination()
+            else:
+                self._action = self.hand.get_available_combination()
+        return self._action
 
     # All possible playable options
-    legal_actions = None
+    @property
+    def legal_actions(self):
+        if self._legal_actions is None:
+            ground = self.ground
+            if ground.type != self.ground_type or ground.value != self.ground_value:
+                ground = Ground()
+                ground.type = self.ground_type
+                ground.value = self.ground_value
+            self._legal_actions = get_legal_combination(self.action, ground)
+        return self._legal_actions
 
-    # num of cards
-    card_num = []
-
-    # All played cards
-    played_cards = None
+    # Lazily yield the actions of one combination type, e.g. next(state.iter_action('strat'), None)
+    def iter_action(self, ctype):
+        if self._action is not None:
+            return iter(self._action[COMBINATION_TYPES.index(ctype)])
+        if self.player.hand is self.hand and self.player.combination_mask == self.hand.mask \
+                and self.player.combinations is not None:
+            return iter(self.player.combinations[COMBINATION_TYPES.index(ctype)])
+        return self.hand.iter_combination(ctype)
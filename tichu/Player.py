@@ -5,17 +5,32 @@ class Player:
 
     def __init__(self, player_id=None):
         self.player_id = player_id
+        self.team = None
+        self.reset()
+
+    # Clear everything but the seat and team, so the player can be dealt a new game
+    def reset(self):
         self.hand = Cards()
         self.won_card = Cards()
         self.point = 0
         self.accumulated_points = []
-        self.team = None
+
+        # Combination index of the hand and the hand mask it was built for
+        self.combinations = None
+        self.combination_mask = 0
 
     def show_hand(self):
-        if self.hand.size == 0:
-            print("No hand!")
-        else:
-            self.hand.show()
+        from tichu.Renderer import render_hand, show
+        show(render_hand(self))
+
+    def get_available_combination(self):
+        if self.combinations is None or self.combination_mask != self.hand.mask:
+            if self.combinations is not None and self.hand.mask & ~self.combination_mask == 0:
+                self.combinations = self.combinations.drop(self.combination_mask & ~self.hand.mask)
+            else:
+                self.combinations = self.hand.get_available_combination()
+            self.combination_mask = self.hand.mask
+        return self.combinations
 
     def play_cards(self, cards, ground, num_out):
         if ground.type != 'none' and cards.type != 'strat_flush' and cards.type != 'four':
@@ -26,6 +41,9 @@ class Player:
 
         if cards.type != 'pass':
             self.hand = self.hand - cards
+            if self.combinations is not None:
+                self.combinations = self.combinations.drop(cards.mask)
+                self.combination_mask = self.hand.mask
             ground.type = cards.type
             ground.value = cards.value
             ground.cards = ground.cards + cards
@@ -0,0 +1,76 @@
+import sys
+
+### Terminal rendering of cards and game states. Only imported for verbose runs and the Human
+### agent, so headless simulation carries no rendering state. Every function builds the whole
+### frame as one string; show writes it with a single call.
+
+SUITS = {'Spade': '♠',
+         'Heart': '♡',
+         'Dia': '♢',
+         'Club': '♣'}
+
+### Cards per row of a rendered hand
+NUM_SHOW = 13
+
+### Five-line image of each card, by card index, built on first use
+CARD_IMAGES = [None] * 52
+
+
+def card_image(card):
+    image = CARD_IMAGES[card.index]
+    if image is None:
+        if card.name != '10':
+            image = ('┌┄┄┄┑', '┆' + card.name + '  ┆', '┆ ' + SUITS[card.suit] + ' ┆',
+                     '┆  ' + card.name + '┆', '┕┄┄┄┙')
+        else:
+            image = ('┌┄┄┄┑', '┆' + card.name + ' ┆', '┆ ' + SUITS[card.suit] + ' ┆',
+                     '┆ ' + card.name + '┆', '┕┄┄┄┙')
+        CARD_IMAGES[card.index] = image
+    return image
+
+
+def render_card(card):
+    return card.name + ' ' + card.suit + '\n'
+
+
+### Cards side by side, num_show per row; '  PASS' for a pass
+def render_cards(cards, num_show=NUM_SHOW):
+    if cards.size == 0 and cards.type == 'pass':
+        return '  PASS\n'
+
+    images = [card_image(card) for card in cards.cards]
+    lines = list()
+    for start in range(0, len(images), num_show):
+        row = images[start:start + num_show]
+        for i in range(5):
+            lines.append(''.join(image[i] for image in row))
+    return ''.join(line + '\n' for line in lines)
+
+
+def render_hand(player):
+    if player.hand.size == 0:
+        return 'No hand!\n'
+    return render_cards(player.hand)
+
+
+### Frame shown to the Human agent: card numbers of the others, its hand and the numbered legal actions
+def render_state(state):
+    frame = ['\n\n',
+             '*** Card num [player1] ' + str(state.card_num[1]) + ' [player2] ' + str(state.card_num[2])
+             + ' [player3] ' + str(state.card_num[3]) + '\n',
+             '*** Player hand\n',
+             render_cards(state.hand)]
+    for i, action in enumerate(state.legal_actions):
+        frame.append('*** (' + str(i) + ') ' + action.type + '\n')
+        frame.append(render_cards(action))
+    return ''.join(frame)
+
+
+### Escape codes moving the cursor up over num_lines lines and clearing them
+def clear_lines(num_lines):
+    return '\033[F\033[K' * num_lines
+
+
+def show(frame):
+    sys.stdout.write(frame)
+    sys.stdout.flush()
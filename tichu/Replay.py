@@ -0,0 +1,66 @@
+import struct
+
+from tichu.Card import Cards
+from tichu.TichuEnv import TichuEnv
+
+### Game log record: number of actions (uint16), the four dealt hand masks and one mask per
+### action, 0 for a pass (uint64, little endian)
+LOG_HEADER = struct.Struct('<H')
+LOG_DEAL = struct.Struct('<4Q')
+
+
+### Streams game logs to an append-only binary file, written in batches of buffer_size games
+class GameLogWriter:
+
+    def __init__(self, path, buffer_size=256):
+        self.file = open(path, 'ab')
+        self.buffer_size = buffer_size
+        self.buffer = list()
+
+    def write(self, deal_masks, action_log):
+        self.buffer.append(LOG_HEADER.pack(len(action_log)) + LOG_DEAL.pack(*deal_masks)
+                           + struct.pack('<%dQ' % len(action_log), *action_log))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.file.write(b''.join(self.buffer))
+        self.file.flush()
+        self.buffer = list()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+### Yield (deal_masks, action_log) for every game in a log file
+def read_game_logs(path):
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(LOG_HEADER.size)
+            if not header:
+                return
+            num_actions = LOG_HEADER.unpack(header)[0]
+            deal_masks = LOG_DEAL.unpack(f.read(LOG_DEAL.size))
+            action_log = struct.unpack('<%dQ' % num_actions, f.read(8 * num_actions))
+            yield deal_masks, action_log
+
+
+### Replay a logged game with the current rules and no agents; returns its points
+def replay_game(deal_masks, action_log, team_names=None):
+    env = TichuEnv(deal=deal_masks)
+    env.set_team_names(team_names if team_names is not None else ['Team 0', 'Team 1'])
+    env.init_game()
+
+    for mask in action_log:
+        action = Cards.from_mask(mask)
+        action.set_combination()
+        env.next_turn(action)
+
+    return env.game.get_points()
@@ -1,6 +1,40 @@
 from tichu.GameState import GameState
 from tichu.Util import Ground
-from tichu.Util import get_legal_combination
+
+### Seat tables per number of players, see get_seat_tables
+SEAT_TABLES = {}
+
+
+### next_seat[gone][seat]: first seat after seat whose bit is not set in the gone mask
+### skipped[seat][next]: mask of the seats strictly between seat and next, going round the table
+def get_seat_tables(num_players):
+    if num_players not in SEAT_TABLES:
+        next_seat = list()
+        for gone in range(1 << num_players):
+            row = list()
+            for seat in range(num_players):
+                nxt = None
+                for step in range(1, num_players + 1):
+                    if not gone >> ((seat + step) % num_players) & 1:
+                        nxt = (seat + step) % num_players
+                        break
+                row.append(nxt)
+            next_seat.append(row)
+
+        skipped = list()
+        for seat in range(num_players):
+            row = list()
+            for nxt in range(num_players):
+                mask = 0
+                i = (seat + 1) % num_players
+                while i != nxt:
+                    mask |= 1 << i
+                    i = (i + 1) % num_players
+                row.append(mask)
+            skipped.append(row)
+
+        SEAT_TABLES[num_players] = (next_seat, skipped)
+    return SEAT_TABLES[num_players]
 
 
 class Round():
@@ -8,13 +42,29 @@ class Round():
     def __init__(self, num_players, first_player, game):
         self.num_players = num_players
         self.current_player = first_player
-        self.out_player = list()
-        self.out_now = list()
+        self.next_seat, self.skipped_seats = get_seat_tables(num_players)
+
+        # Seats out of the game in finishing order. The first num_out_player are out for good, the
+        # rest went out during the current trick and still count for passing until play moves past them.
+        self.finish_order = [0] * num_players
+        self.num_out = 0
+        self.num_out_player = 0
+        self.out_mask = 0
+        self.out_now_mask = 0
+
         self.num_pass = 0
         self.ground = Ground()
         self.used = list()
         self.game = game
 
+    @property
+    def out_player(self):
+        return self.finish_order[:self.num_out_player]
+
+    @property
+    def out_now(self):
+        return self.finish_order[self.num_out_player:self.num_out]
+
     def proceed_round(self, players, action):
         player = players[self.current_player]
 
@@ -22,48 +72,41 @@ class Round():
             self.num_pass += 1
         else:
             self.num_pass = 0
-            if player.play_cards(action, self.ground, len(self.out_player)):
-                self.out_now.append(self.current_player)
+            if player.play_cards(action, self.ground, self.num_out_player):
+                self.finish_order[self.num_out] = self.current_player
+                self.num_out += 1
+                self.out_now_mask |= 1 << self.current_player
                 self.game.rounds_played_per_player[self.current_player] = self.game.rounds_played
 
-
-
-        self.current_player = (self.current_player + 1) % self.num_players
-        while self.out_player.count(self.current_player) == 1 or self.out_now.count(self.current_player) == 1:
-            if self.out_now.count(self.current_player) == 1:
-                self.out_player += self.out_now
-                self.out_now = list()
-            self.current_player = (self.current_player + 1) % self.num_players
+        next_player = self.next_seat[self.out_mask | self.out_now_mask][self.current_player]
+        if self.skipped_seats[self.current_player][next_player] & self.out_now_mask:
+            self.settle_out_now()
+        self.current_player = next_player
 
         if self.is_over():
-            self.out_player += self.out_now
-            self.out_now = list()
+            self.settle_out_now()
             players[self.ground.player_id].win(self.ground)
             self.reset_round()
             self.track_points()
 
-            while self.out_player.count(self.current_player) == 1:
-                self.current_player = (self.current_player + 1) % self.num_players
+            if self.out_mask >> self.current_player & 1:
+                self.current_player = self.next_seat[self.out_mask][self.current_player]
+
+    def settle_out_now(self):
+        self.out_mask |= self.out_now_mask
+        self.out_now_mask = 0
+        self.num_out_player = self.num_out
 
     def get_state(self, players, player_id):
-        state = GameState()
-        player = players[player_id]
-        state.hand = player.hand
-        state.ground = self.ground
-        state.action = player.hand.get_available_combination()
-        state.legal_actions = get_legal_combination(state.action, self.ground)
-        for player in players:
-            state.card_num.append(player.hand.size)
-
-        state.played_cards = self.used
-        return state
+        card_num = tuple([player.hand.size for player in players])
+        return GameState(players[player_id], self.ground, self.used, card_num)
 
     def track_points(self):
         for player in self.game.players:
             player.accumulated_points.append(player.point)
 
     def is_over(self):
-        return self.num_pass >= 3 - len(self.out_player)
+        return self.num_pass >= 3 - self.num_out_player
 
     def reset_round(self):
         self.num_pass = 0
@@ -72,7 +115,7 @@ class Round():
         self.game.rounds_played += 1
 
     def get_num_out(self):
-        return len(self.out_player + self.out_now)
+        return self.num_out
 
     def get_out_players(self):
-        return self.out_player + self.out_now
+        return self.finish_order[:self.num_out]
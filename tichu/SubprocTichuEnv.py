@@ -0,0 +1,174 @@
+import multiprocessing as mp
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tichu.Util import STATE_SIZE
+from tichu.VecTichuEnv import VecTichuEnv, check_actions
+
+ACTION_NUM = 8192
+
+### Shared buffers of SubprocTichuEnv: name -> (shape after the env axis, dtype)
+SHARED_BUFFERS = (('observations', (STATE_SIZE,), np.float64),
+                  ('action_masks', (ACTION_NUM,), np.bool_),
+                  ('rewards', (4,), np.float64),
+                  ('dones', (), np.bool_),
+                  ('player_ids', (), np.int64),
+                  ('actions', (), np.int64))
+
+
+### Arrays of num_envs rows over the shared memory blocks, in SHARED_BUFFERS order
+def get_shared_arrays(blocks, num_envs):
+    arrays = dict()
+    for (key, shape, dtype), block in zip(SHARED_BUFFERS, blocks):
+        arrays[key] = np.ndarray((num_envs,) + shape, dtype=dtype, buffer=block.buf)
+    return arrays
+
+
+### Worker process: steps the games start to end of the shared buffers with a VecTichuEnv
+def worker(conn, names, num_envs, start, end, team_names, seed):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        run_worker(conn, get_shared_arrays(blocks, num_envs), start, end, team_names, seed)
+    finally:
+        for block in blocks:
+            block.close()
+        conn.close()
+
+
+def run_worker(conn, arrays, start, end, team_names, seed):
+    buffers = tuple(arrays[key][start:end] for key in ('observations', 'action_masks', 'rewards', 'dones',
+                                                       'player_ids'))
+    env = VecTichuEnv(end - start, team_names=team_names, seed=seed + start if seed is not None else None,
+                      buffers=buffers)
+    actions = arrays['actions'][start:end]
+
+    while True:
+        try:
+            command = conn.recv()
+        except EOFError:
+            return
+
+        try:
+            if command == 'reset':
+                env.reset()
+            elif command == 'step':
+                env.step(actions)
+            elif command == 'close':
+                conn.send(('ok', None))
+                return
+            else:
+                raise ValueError("[SubprocTichuEnv.worker] Unknown command " + str(command))
+            conn.send(('ok', None))
+        except Exception as e:
+            conn.send(('error', e))
+
+
+### Stop the workers and free the shared memory of a SubprocTichuEnv. Also run by its finalizer, so an env
+### that is garbage collected, or still open at exit, does not leak workers or /dev/shm segments.
+def release(conns, processes, blocks):
+    for conn in conns:
+        try:
+            conn.send('close')
+            conn.recv()
+        except (OSError, EOFError):
+            pass
+        conn.close()
+    for process in processes:
+        process.join()
+
+    for block in blocks:
+        # Arrays still viewing the block keep its mapping alive; the segment itself is removed either way
+        try:
+            block.close()
+        except BufferError:
+            pass
+        block.unlink()
+
+
+### VecTichuEnv split over num_workers processes. The games are cut into contiguous slices, one per
+### worker; observations, action masks, rewards, done flags, players to act and actions live in
+### shared memory, so only the commands travel through the pipes. Returned arrays are the shared
+### buffers themselves and are overwritten by the next call. Use close(), or a with block, to stop
+### the workers and free the shared memory; a finalizer does it when the env is garbage collected or at exit.
+class SubprocTichuEnv:
+
+    # num_workers: defaults to one per CPU, at most num_envs. seed: as for VecTichuEnv, game i deals from seed + i.
+    # start_method: multiprocessing start method, e.g. 'spawn'; the platform default otherwise
+    def __init__(self, num_envs, num_workers=None, team_names=None, seed=None, start_method=None):
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        num_workers = max(1, min(num_workers, num_envs))
+
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        self.action_num = ACTION_NUM
+        self.closed = False
+
+        self.blocks = list()
+        self.conns = list()
+        self.processes = list()
+        self.finalizer = weakref.finalize(self, release, self.conns, self.processes, self.blocks)
+        for key, shape, dtype in SHARED_BUFFERS:
+            size = num_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+            self.blocks.append(shared_memory.SharedMemory(create=True, size=max(size, 1)))
+        arrays = get_shared_arrays(self.blocks, num_envs)
+        self.observations = arrays['observations']
+        self.action_masks = arrays['action_masks']
+        self.rewards = arrays['rewards']
+        self.dones = arrays['dones']
+        self.player_ids = arrays['player_ids']
+        self.actions = arrays['actions']
+
+        context = mp.get_context(start_method)
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        for w in range(num_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=worker,
+                                      args=(child_conn, [block.name for block in self.blocks], num_envs,
+                                            int(bounds[w]), int(bounds[w + 1]), team_names, seed),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+    def command(self, command):
+        for conn in self.conns:
+            conn.send(command)
+
+        error = None
+        for conn in self.conns:
+            status, e = conn.recv()
+            if status == 'error' and error is None:
+                error = e
+        if error is not None:
+            raise error
+
+    # Start a new game in every environment
+    def reset(self):
+        self.command('reset')
+        return self.observations, self.action_masks
+
+    # actions: action number (see Util.action2num) of the player to act in each game.
+    # All actions are checked here against the shared masks before any worker steps.
+    def step(self, actions):
+        check_actions(actions, self.action_masks, "SubprocTichuEnv.step")
+        self.actions[:] = actions
+        self.command('step')
+        return self.observations, self.action_masks, self.rewards, self.dones
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+
+        self.observations = self.action_masks = self.rewards = self.dones = self.player_ids = self.actions = None
+        self.finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,3 +1,4 @@
+import random
 import time
 
 import numpy as np
@@ -7,8 +8,15 @@ from tichu.Game import Game
 
 class TichuEnv:
 
-    def __init__(self, verbose=0):
+    # seed: seeds this env's own random source for dealing; without it the global random module is used.
+    # deal: four hand masks dealt instead of shuffling. log_writer: Replay.GameLogWriter receiving every game run.
+    # recorder: GameRecorder.GameRecorder receiving a record of every game run.
+    def __init__(self, verbose=0, seed=None, deal=None, log_writer=None, recorder=None):
         self.verbose = verbose
+        self.rng = random.Random(seed) if seed is not None else random
+        self.deal = deal
+        self.log_writer = log_writer
+        self.recorder = recorder
         self.game = Game(self)
         self.player_num = self.game.get_player_num()
         self.positional_outcome = {}
@@ -29,15 +37,26 @@ class TichuEnv:
 
         return next_player, player_id
 
-    def run(self):
-        active_player, player_id = self.init_game()
+    # Start a new game in this env, reusing its game, deck and player objects.
+    # seed reseeds the dealing random source. deal: four hand masks dealt for this game only, e.g. the
+    # deal_masks of another game to replay its cards (duplicate play); the dealing source is not used then.
+    def reset(self, seed=None, deal=None):
+        if seed is not None:
+            self.rng = random.Random(seed)
+
+        self.positional_outcome = {}
+        self.rounds_to_win = None
+        self.timestep = 0
+        return self.init_game(deal)
+
+    def run(self, seed=None, deal=None):
+        active_player, player_id = self.reset(seed, deal)
         return_hand = self.game.get_active_player(0).hand  # for handValue
 
         if self.verbose:
-            print("Your hand (player0) ")
-            h_state = self.game.get_active_player(0)
-            h_state.hand.show()
-            print("First player: " + str(player_id))
+            from tichu.Renderer import render_cards, show
+            show("Your hand (player0) \n" + render_cards(self.game.get_active_player(0).hand)
+                 + "First player: " + str(player_id) + "\n")
 
         # While game is not over continue taking turns.
         while not self.is_over():
@@ -48,8 +67,7 @@ class TichuEnv:
             action = self.agents[player_id].play(active_player)
 
             if self.verbose:
-                print("Player" + str(player_id))
-                action.show()
+                show("Player" + str(player_id) + "\n" + render_cards(action))
 
             next_player, next_player_id = self.next_turn(action)
 
@@ -60,18 +78,23 @@ class TichuEnv:
             active_player = self.get_state(player_id)
 
         game_points = self.game.get_points()
+        if self.log_writer is not None:
+            self.log_writer.write(self.game.deal_masks, self.game.action_log)
+        if self.recorder is not None:
+            self.recorder.write(self.game.deal_masks, [agent.strategy for agent in self.agents],
+                                [p.accumulated_points for p in self.game.players],
+                                self.game.round.get_out_players(), self.rounds_to_win, game_points)
         if self.verbose:
-            print(f"Points: {game_points}")
-            for i in self.game.players:
-                print(f"History for {i.player_id}: {i.accumulated_points}")
+            show(f"Points: {game_points}\n" + "".join(f"History for {i.player_id}: {i.accumulated_points}\n"
+                                                      for i in self.game.players))
 
         return game_points, [p.accumulated_points for p in self.game.players], self.rounds_to_win, self.positional_outcome
 
     def is_over(self):
         return self.game.is_over()
 
-    def init_game(self):
-        return self.game.init_game()
+    def init_game(self, deal=None):
+        return self.game.init_game(self.rng, deal if deal is not None else self.deal)
 
     def get_points(self):
         R = np.array(self.game.get_points())
@@ -1,8 +1,14 @@
 import random
+from bisect import bisect_right
 
 import numpy as np
 
-from tichu.Card import Cards
+from tichu.Card import Cards, Combinations, COMBINATION_TYPES
+
+COMBINATION_INDEX = {ctype: idx for idx, ctype in enumerate(COMBINATION_TYPES)}
+
+### Combination types whose value is 100 * number of cards + lowest value
+SEQUENCE_TYPES = ('strat', 'strat_flush', 'pair_seq')
 
 
 class Ground:
@@ -15,9 +21,10 @@ class Ground:
 
 
 ### Deal cards from Cards() to Cards()
-def Deal(giver, recver, deck=0, card_num=0, card_deal=None):
+### rng is the random source for deck dealing, e.g. a seeded random.Random
+def Deal(giver, recver, deck=0, card_num=0, card_deal=None, rng=random):
     if deck == 1:
-        cards = Cards(card_list=random.sample(giver.cards, card_num))
+        cards = Cards(card_list=rng.sample(giver.cards, card_num))
         giver -= cards
         recver += cards
     else:
@@ -29,74 +36,33 @@ def Deal(giver, recver, deck=0, card_num=0, card_deal=None):
 
 ### Return legal combination considering ground
 ### 0: solo, 1: pair, 2: triple, 3: four, 4: full, 5: strat, 6: strat_flush, 7: pair_seq
+### combinations is not modified; plays above the ground are found by bisecting its value index.
+### Straights and pair sequences must have the same length (value // 100) as the ground.
 def get_legal_combination(combinations, ground):
-    rt_set = list()
-    pass_set = Cards(ctype='pass')
-    rt_set.append(pass_set)
-    remove_set = list()
+    if not isinstance(combinations, Combinations):
+        combinations = Combinations(combinations)
 
     if ground.type == 'none':
-        rt_set = combinations[0] + combinations[1] + combinations[2] + combinations[3] + combinations[4] + combinations[
-            5] + combinations[6] + combinations[7]
-    elif ground.type == 'solo':
-        for i in combinations[0]:
-            if i.value <= ground.value:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[0].remove(i)
-        rt_set = rt_set + combinations[0] + combinations[3] + combinations[6]
-    elif ground.type == 'pair':
-        for i in combinations[1]:
-            if i.value <= ground.value:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[1].remove(i)
-        rt_set = rt_set + combinations[1] + combinations[3] + combinations[6]
-    elif ground.type == 'triple':
-        for i in combinations[2]:
-            if i.value <= ground.value:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[2].remove(i)
-        rt_set = rt_set + combinations[2] + combinations[3] + combinations[6]
-    elif ground.type == 'four':
-        for i in combinations[3]:
-            if i.value <= ground.value:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[3].remove(i)
-        rt_set = rt_set + combinations[3]
-    elif ground.type == 'full':
-        for i in combinations[4]:
-            if i.value <= ground.value:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[4].remove(i)
-        rt_set = rt_set + combinations[4] + combinations[3] + combinations[6]
-    elif ground.type == 'strat':
-        for i in combinations[5]:
-            if i.value / 100 != ground.value / 100 or i.value % 100 <= ground.value % 100:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[5].remove(i)
-        rt_set = rt_set + combinations[5] + combinations[3] + combinations[6]
-    elif ground.type == 'strat_flush':
-        for i in combinations[6]:
-            if i.value / 100 != ground.value / 100 or i.value % 100 <= ground.value % 100:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[6].remove(i)
-        rt_set = rt_set + combinations[6]
-    elif ground.type == 'pair_seq':
-        for i in combinations[7]:
-            if i.value / 100 != ground.value / 100 or i.value % 100 <= ground.value % 100:
-                remove_set.append(i)
-        for i in remove_set:
-            combinations[7].remove(i)
-        rt_set = rt_set + combinations[7] + combinations[3] + combinations[6]
-    else:
+        rt_set = list()
+        for i in combinations:
+            rt_set += i
+        return rt_set
+
+    if ground.type not in COMBINATION_INDEX:
         raise ValueError("[get_legal_combination] Wrong ground type")
 
+    idx = COMBINATION_INDEX[ground.type]
+    values, legal = combinations.get_by_value(idx)
+    start = bisect_right(values, ground.value)
+    if ground.type in SEQUENCE_TYPES:
+        end = bisect_right(values, ground.value // 100 * 100 + 99, start)
+    else:
+        end = len(values)
+
+    rt_set = [Cards(ctype='pass')]
+    rt_set += legal[start:end]
+    if ground.type != 'four' and ground.type != 'strat_flush':
+        rt_set += combinations.bombs
     return rt_set
 
 
@@ -126,87 +92,136 @@ def reorganize(trajectories, R):
 
 
 def num2action(action_num, hand_list):
-    action = Cards()
-
+    mask = 0
     for i in range(len(hand_list)):
-        if (action_num % (2 ** (i + 1))) // (2 ** i) == 1:
-            action.add(hand_list[i])
+        if (action_num >> i) & 1:
+            mask |= 1 << hand_list[i].index
 
+    action = Cards.from_mask(mask)
     action.set_combination()
     return action
 
 
-def action2num(action, hand):
-    action_num = 0
+### Bit of each card of the hand in the action number, indexed by card index
+def get_action_bits(hand):
+    action_bits = [0] * 52
+    for j, card in enumerate(hand.cards):
+        action_bits[card.index] = 1 << j
+    return action_bits
+
 
-    for i in range(action.size):
-        for j in range(hand.size):
-            if action.cards[i] == hand.cards[j]:
-                action_num += 2 ** j
+def action2num(action, hand, action_bits=None):
+    if action_bits is None:
+        action_bits = get_action_bits(hand)
+
+    action_num = 0
+    for card in action.cards:
+        action_num |= action_bits[card.index]
 
     return action_num
 
 
 def get_available_action_array(action_set, hand):
     action_array = np.zeros((8192,), dtype=int)
+    action_bits = get_action_bits(hand)
     for i in action_set:
-        action_array[action2num(i, hand)] = 1
+        action_array[action2num(i, hand, action_bits)] = 1
     return action_array
 
 
-def state_parse(state):
-    hand = state.hand
-    hand_state = np.zeros(26)
-    for i in range(hand.size):
-        hand_state[2 * i] = hand.cards[i].value
-        if hand.cards[i].suit == 'Spade':
-            hand_state[2 * i + 1] = 1
-        elif hand.cards[i].suit == 'Heart':
-            hand_state[2 * i + 1] = 2
-        elif hand.cards[i].suit == 'Dia':
-            hand_state[2 * i + 1] = 3
-        elif hand.cards[i].suit == 'Club':
-            hand_state[2 * i + 1] = 4
-        else:
-            raise ValueError
-
-    ground_state = np.zeros(3)
-    ground_type = state.ground.type
-    if ground_type == 'none':
-        ground_state[0] = 0
-    elif ground_type == 'solo':
-        ground_state[0] = 1
-    elif ground_type == 'pair':
-        ground_state[0] = 2
-    elif ground_type == 'triple':
-        ground_state[0] = 3
-    elif ground_type == 'four':
-        ground_state[0] = 4
-    elif ground_type == 'full':
-        ground_state[0] = 5
-    elif ground_type == 'strat':
-        ground_state[0] = 6
-    elif ground_type == 'strat_flush':
-        ground_state[0] = 7
-    elif ground_type == 'pair_seq':
-        ground_state[0] = 8
+### Batched get_available_action_array: writes the masks of N (hand, action_set) pairs into a
+### (N, 8192) boolean buffer, which is allocated only when out is not given
+def get_available_action_arrays(hands, action_sets, out=None):
+    if out is None:
+        out = np.zeros((len(hands), 8192), dtype=bool)
     else:
-        raise ValueError
-    ground_state[1] = state.ground.value
-    ground_state[2] = state.ground.player_id
+        out[:len(hands)] = False
+
+    rows = list()
+    cols = list()
+    for row in range(len(hands)):
+        action_bits = get_action_bits(hands[row])
+        for i in action_sets[row]:
+            rows.append(row)
+            cols.append(action2num(i, hands[row], action_bits))
+
+    out[rows, cols] = True
+    return out
 
-    card_state = np.zeros(3)
-    card_state[0] = state.card_num[1]
-    card_state[1] = state.card_num[2]
-    card_state[2] = state.card_num[3]
 
-    used = np.zeros(8)
-    state.played_cards.sort()
-    size = len(state['played_cards'])
-    if size >= 8:
-        for i in range(8):
-            used[i] = state['played_cards'][size - 1 - i].value
+### Batched num2action: one decoded action per (action number, hand list) pair
+def num2actions(action_nums, hand_lists):
+    return [num2action(int(action_nums[i]), hand_lists[i]) for i in range(len(hand_lists))]
+
+
+def state_parse(state):
+    return encode_states([state])[0]
 
-    rt_state = np.concatenate((hand_state, ground_state, card_state, used), axis=None)
 
-    return rt_state
+### Observation layout of encode_states (TichuEnv.state_shape):
+### 0-25 value and suit code of each hand card, 26-28 ground type, value and player,
+### 29-31 card num of players 1-3, 32-39 the 8 highest played values once 8 cards are played.
+### With one_hot, 52 hand and 52 played card bits follow, indexed by card index.
+STATE_SIZE = 40
+ONE_HOT_STATE_SIZE = STATE_SIZE + 2 * 52
+
+SUIT_CODES = {'Spade': 1, 'Heart': 2, 'Dia': 3, 'Club': 4}
+GROUND_TYPE_CODES = {'none': 0, 'solo': 1, 'pair': 2, 'triple': 3, 'four': 4, 'full': 5, 'strat': 6,
+                     'strat_flush': 7, 'pair_seq': 8}
+
+CARD_BITS = np.arange(52, dtype=np.uint64)
+
+
+### Write the observations of N states into an (N, 40) or, with one_hot, (N, 144) buffer
+def encode_states(states, out=None, one_hot=False):
+    width = ONE_HOT_STATE_SIZE if one_hot else STATE_SIZE
+    if out is None:
+        out = np.zeros((len(states), width))
+    else:
+        out[:len(states), :width] = 0
+
+    rows = list()
+    hand_masks = list()
+    played_masks = list()
+    for state in states:
+        features = [0] * STATE_SIZE
+
+        i = 0
+        for card in state.hand.cards:
+            features[i] = card.value
+            features[i + 1] = SUIT_CODES[card.suit]
+            i += 2
+
+        if state.ground.type not in GROUND_TYPE_CODES:
+            raise ValueError("[encode_states] Wrong ground type")
+        features[26] = GROUND_TYPE_CODES[state.ground.type]
+        features[27] = state.ground.value
+        features[28] = state.ground.player_id
+
+        features[29:32] = state.card_num[1:4]
+
+        played_cards = state.played_cards
+        if len(played_cards) >= 8:
+            values = [card.value for card in played_cards]
+            values.sort()
+            features[32:40] = values[:-9:-1]
+
+        rows.append(features)
+
+        if one_hot:
+            hand_masks.append(state.hand.mask)
+            played_mask = 0
+            for card in played_cards:
+                played_mask |= 1 << card.index
+            played_masks.append(played_mask)
+
+    if rows:
+        out[:len(states), :STATE_SIZE] = rows
+
+    if one_hot and rows:
+        hand_masks = np.array(hand_masks, dtype=np.uint64)
+        played_masks = np.array(played_masks, dtype=np.uint64)
+        out[:len(states), STATE_SIZE:STATE_SIZE + 52] = (hand_masks[:, None] >> CARD_BITS) & 1
+        out[:len(states), STATE_SIZE + 52:ONE_HOT_STATE_SIZE] = (played_masks[:, None] >> CARD_BITS) & 1
+
+    return out
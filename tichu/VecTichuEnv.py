@@ -0,0 +1,93 @@
+import numpy as np
+
+from tichu.TichuEnv import TichuEnv
+from tichu.Util import encode_states, get_available_action_arrays, num2action, STATE_SIZE
+
+
+### Raise a ValueError naming the first game whose action is not set in its row of action_masks
+def check_actions(actions, action_masks, caller):
+    actions = np.asarray(actions).astype(np.int64)
+    if actions.shape != (len(action_masks),):
+        raise ValueError("[" + caller + "] Expected " + str(len(action_masks)) + " actions, got shape "
+                         + str(actions.shape))
+
+    in_range = (actions >= 0) & (actions < action_masks.shape[1])
+    legal = in_range.copy()
+    legal[in_range] = action_masks[np.flatnonzero(in_range), actions[in_range]]
+    if not legal.all():
+        i = int(np.argmin(legal))
+        raise ValueError("[" + caller + "] Illegal action " + str(actions[i]) + " in env " + str(i))
+
+
+### N independent games stepped together. Observations, action masks, rewards and done flags are
+### returned as stacked arrays. A finished game is reset right away, so its returned observation is
+### already the first state of the next game. The returned arrays are buffers owned by the
+### environment and are overwritten by the next call.
+class VecTichuEnv:
+
+    # seed: env i deals from seed + i, so a batch of games is reproducible.
+    # buffers: optional (observations, action_masks, rewards, dones, player_ids) arrays of num_envs rows
+    # written instead of allocating new ones, e.g. views of shared memory (see SubprocTichuEnv)
+    def __init__(self, num_envs, team_names=None, seed=None, buffers=None):
+        self.num_envs = num_envs
+        self.action_num = 8192
+
+        self.envs = list()
+        for i in range(num_envs):
+            env = TichuEnv(seed=seed + i if seed is not None else None)
+            env.set_team_names(team_names if team_names is not None else ['Team 0', 'Team 1'])
+            self.envs.append(env)
+
+        self.states = [None] * num_envs
+
+        if buffers is not None:
+            self.observations, self.action_masks, self.rewards, self.dones, self.player_ids = buffers
+            return
+
+        # Player to act in each game
+        self.player_ids = np.zeros(num_envs, dtype=np.int64)
+
+        self.observations = np.zeros((num_envs, STATE_SIZE))
+        self.action_masks = np.zeros((num_envs, self.action_num), dtype=bool)
+
+        # Final points of each seat, set on the step that ends a game
+        self.rewards = np.zeros((num_envs, 4))
+        self.dones = np.zeros(num_envs, dtype=bool)
+
+    # Start a new game in every environment
+    def reset(self):
+        for i in range(self.num_envs):
+            self.reset_env(i)
+
+        self.update_observations()
+        return self.observations, self.action_masks
+
+    def reset_env(self, i):
+        self.states[i], self.player_ids[i] = self.envs[i].reset()
+
+    # actions: action number (see Util.action2num) of the player to act in each game
+    # All actions are checked before any game is stepped, so an illegal action leaves every game as it was
+    def step(self, actions):
+        check_actions(actions, self.action_masks, "VecTichuEnv.step")
+
+        self.rewards[:] = 0
+        self.dones[:] = False
+
+        for i in range(self.num_envs):
+            action_num = int(actions[i])
+            env = self.envs[i]
+            action = num2action(action_num, self.states[i].hand.cards)
+            self.states[i], self.player_ids[i] = env.next_turn(action)
+
+            if env.is_over():
+                self.rewards[i] = env.game.get_points()
+                self.dones[i] = True
+                self.reset_env(i)
+
+        self.update_observations()
+        return self.observations, self.action_masks, self.rewards, self.dones
+
+    def update_observations(self):
+        encode_states(self.states, out=self.observations)
+        get_available_action_arrays([state.hand for state in self.states],
+                                    [state.legal_actions for state in self.states], out=self.action_masks)